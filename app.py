@@ -4,52 +4,725 @@ Free Game Checker V2.0 - Main Application
 Monitors game stores for free games with platform support
 """
 
-import requests
-from bs4 import BeautifulSoup
+# Annotations name lazily imported modules (requests.Response, ...), so
+# they must not be evaluated at definition time
+from __future__ import annotations
+
 import json
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from datetime import datetime, timedelta
-import schedule
+from datetime import datetime, timedelta, timezone
 import time
 import logging
 from pathlib import Path
 import sqlite3
-from typing import List, Dict
+from typing import List, Dict, Optional, Iterator, Callable
 import re
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit
 import os
+import sys
+import threading
+import asyncio
+import hashlib
+import codecs
+import functools
+import itertools
+import contextlib
+import contextvars
+import random
+import importlib
+import importlib.util
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
-# Google Play scraper library
-try:
-    from google_play_scraper import search, app as gplay_app
-    GPLAY_AVAILABLE = True
-except ImportError:
-    GPLAY_AVAILABLE = False
-    logging.warning("google-play-scraper not installed. Google Play scraping disabled.")
-
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('/var/log/free-game-checker.log'),
-        logging.StreamHandler()
-    ]
-)
+class LazyModule:
+    """
+    Stand-in for a module that is imported the first time one of its
+    attributes is used. The web process imports app for the Database and
+    never scrapes or sends mail itself, so it shouldn't pay for those
+    dependencies at startup.
+    """
+    
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+    
+    def __getattr__(self, attr: str):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+requests = LazyModule('requests')
+bs4 = LazyModule('bs4')
+soupsieve = LazyModule('soupsieve')
+smtplib = LazyModule('smtplib')
+jinja2 = LazyModule('jinja2')
+markupsafe = LazyModule('markupsafe')
+schedule = LazyModule('schedule')
+
+# Fast HTML parsing: lxml builds trees far quicker than html.parser
+HTML_PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+# Google Play scraper library, imported when Google Play is scraped
+GPLAY_AVAILABLE = importlib.util.find_spec('google_play_scraper') is not None
+
+LOG_FILE = '/var/log/free-game-checker.log'
 logger = logging.getLogger(__name__)
 
+def setup_logging(log_file: str = LOG_FILE):
+    """Log to the console and log_file; called by the entry points, not on import"""
+    handlers = [logging.StreamHandler()]
+    try:
+        handlers.append(logging.FileHandler(log_file))
+    except OSError as e:
+        print(f"Not logging to {log_file}: {e}", file=sys.stderr)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=handlers
+    )
+
 # Configuration
 CONFIG_FILE = '/etc/free-game-checker/config.json'
 DB_FILE = '/var/lib/free-game-checker/games.db'
+HTTP_CACHE_DIR = '/var/lib/free-game-checker/http-cache'
+GPLAY_CACHE_FILE = '/var/lib/free-game-checker/gplay-apps.json'
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
 
 # Platform order for sorting
 PLATFORM_ORDER = {'PC': 1, 'Xbox': 2, 'Nintendo Switch': 3, 'Android': 4}
 
+# Parallel scraping defaults (overridable in config.json)
+DEFAULT_SCRAPE_WORKERS = 8
+DEFAULT_STORE_TIMEOUT = 60      # seconds a single store may take
+DEFAULT_SCRAPE_TIMEOUT = 180    # seconds the whole check may take
+
+# Shared HTTP transport defaults (overridable via the "http" section of config.json)
+DEFAULT_HTTP_CONFIG = {
+    'timeout': 10,              # seconds per request
+    'pool_connections': 20,     # number of hosts to keep connection pools for
+    'pool_maxsize': 4,          # connections kept alive per host
+    'pool_block': True,         # wait for a free connection instead of exceeding pool_maxsize
+    'retries': 2,               # retries on connection errors and retryable statuses
+    'backoff_factor': 0.5,      # sleep 0.5s, 1s, 2s... between retries
+    'retry_statuses': [500, 502, 503, 504],     # 429 and Retry-After are retried by get(), through the rate limiter
+    'stream': True,             # parse long listing pages while they download
+    'stream_chunk_size': 16384,
+    'rate_limit': 2,            # requests per second per host, 0 = unlimited
+    'rate_burst': 4,            # requests a host may get back to back before rate_limit applies
+    'host_rate_limits': {},     # per-host overrides, e.g. {"steamdb.info": 0.5}
+    'max_rate_wait': 30,        # fail a request instead of waiting longer than this for its host
+    'respect_robots': False     # also slow down to each host's robots.txt Crawl-delay
+}
+
+# Metric name -> (type, help) for everything the checker records
+METRIC_DEFINITIONS = {
+    'fgc_scrape_seconds': ('histogram', 'Time to scrape a store'),
+    'fgc_scrape_games_total': ('counter', 'Games found by store scrapes'),
+    'fgc_scrape_errors_total': ('counter', 'Store scrapes that failed or timed out'),
+    'fgc_http_request_seconds': ('histogram', 'Time to fetch a store page, until the headers or full body arrive'),
+    'fgc_http_requests_total': ('counter', 'HTTP requests by store and status code'),
+    'fgc_http_errors_total': ('counter', 'HTTP requests that failed without a response'),
+    'fgc_http_downloaded_bytes_total': ('counter', 'Response body bytes downloaded'),
+    'fgc_http_rate_limit_wait_seconds': ('histogram', 'Time requests waited for their host\'s rate limit'),
+    'fgc_http_throttled_total': ('counter', 'Responses asking us to slow down (429, or 503 with Retry-After)'),
+    'fgc_parse_seconds': ('histogram', 'Time spent building HTML trees'),
+    'fgc_db_seconds': ('histogram', 'Time spent running SQL statements and fetching their rows'),
+    'fgc_email_render_seconds': ('histogram', 'Time to render an email digest'),
+    'fgc_email_send_seconds': ('histogram', 'Time to send one email digest to all recipients'),
+    'fgc_emails_sent_total': ('counter', 'Emails accepted by the SMTP server'),
+    'fgc_email_errors_total': ('counter', 'Emails that could not be delivered'),
+    'fgc_last_run_timestamp_seconds': ('gauge', 'When the last check finished'),
+    'fgc_last_run_duration_seconds': ('gauge', 'How long the last check took'),
+    'fgc_store_up': ('gauge', 'Whether the store answered in its last check'),
+    'fgc_store_games': ('gauge', 'Games found in the store\'s last check'),
+    'fgc_store_scrape_seconds': ('gauge', 'How long the store\'s last check took'),
+    'fgc_store_last_check_timestamp_seconds': ('gauge', 'When the store was last checked'),
+    'fgc_store_circuit_open': ('gauge', 'Whether the store is being skipped by its circuit breaker')
+}
+METRIC_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Store being scraped by the current thread or task, used as a metric label
+current_store = contextvars.ContextVar('current_store', default='')
+# RunStats of the check in progress, if any
+current_run = contextvars.ContextVar('current_run', default=None)
+# Trace being recorded by check-now --profile, and the innermost open span
+current_trace = contextvars.ContextVar('current_trace', default=None)
+current_span = contextvars.ContextVar('current_span', default=None)
+
+class Trace:
+    """
+    Timed spans from one profiled check, saved as a Chrome trace-event JSON
+    file (viewable in chrome://tracing or Perfetto) with a per-span summary
+    that can be diffed between runs. Optionally carries cProfile stats and
+    a tracemalloc snapshot.
+    """
+    
+    def __init__(self, cprofile: bool = False):
+        self.lock = threading.Lock()
+        self.spans = []
+        self.ids = itertools.count(1)
+        self.start = time.perf_counter()
+        self.started_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        self.cprofile = cprofile
+        self.profile_stats = None
+    
+    @contextlib.contextmanager
+    def span(self, name: str, detail: Optional[Dict] = None, **attrs):
+        """Time the block as a span; attrs group it in the summary, detail is only recorded"""
+        span_id = next(self.ids)
+        parent = current_span.get()
+        token = current_span.set(span_id)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            current_span.reset(token)
+            with self.lock:
+                self.spans.append({
+                    'id': span_id, 'parent': parent, 'name': name, 'attrs': attrs, 'detail': detail or {},
+                    'start': start - self.start, 'duration': duration,
+                    'thread': threading.current_thread().name
+                })
+    
+    def profile_call(self, func: Callable, *args):
+        """Run func under cProfile when profiling, merging stats from every thread"""
+        if not self.cprofile:
+            return func(*args)
+        import cProfile
+        import pstats
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(func, *args)
+        finally:
+            with self.lock:
+                if self.profile_stats is None:
+                    self.profile_stats = pstats.Stats(profile)
+                else:
+                    self.profile_stats.add(profile)
+    
+    def summary(self) -> Dict[str, Dict]:
+        """Count, total and max milliseconds per span name and attributes, for comparing runs"""
+        summary = {}
+        for span in self.spans:
+            attrs = ','.join(f'{key}={value}' for key, value in sorted(span['attrs'].items()))
+            totals = summary.setdefault(f"{span['name']}{{{attrs}}}" if attrs else span['name'],
+                                        {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            totals['count'] += 1
+            totals['total_ms'] += span['duration'] * 1000
+            totals['max_ms'] = max(totals['max_ms'], span['duration'] * 1000)
+        return {key: {name: round(value, 3) for name, value in totals.items()}
+                for key, totals in sorted(summary.items())}
+    
+    def save(self, path: str, snapshot=None, peak_memory: int = 0, result: Optional[Dict] = None):
+        threads = {}
+        events = [{
+            'name': ' '.join([span['name']] + [str(value) for value in span['attrs'].values()]),
+            'cat': span['name'],
+            'ph': 'X',
+            'ts': round(span['start'] * 1e6),
+            'dur': round(span['duration'] * 1e6),
+            'pid': os.getpid(),
+            'tid': threads.setdefault(span['thread'], len(threads) + 1),
+            'args': {**span['attrs'], **span['detail'], 'id': span['id'], 'parent': span['parent']}
+        } for span in sorted(self.spans, key=lambda span: span['start'])]
+        events += [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': name}}
+                   for name, tid in threads.items()]
+        
+        trace = {
+            'run': {
+                'started_at': self.started_at,
+                'duration_ms': round((time.perf_counter() - self.start) * 1000, 3),
+                'html_parser': HTML_PARSER,
+                'result': result
+            },
+            'summary': self.summary(),
+            'traceEvents': events
+        }
+        
+        if self.profile_stats is not None:
+            # Raw stats next to the trace for snakeviz/pstats, top functions inline
+            self.profile_stats.dump_stats(os.path.splitext(path)[0] + '.prof')
+            top = sorted(self.profile_stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:40]
+            trace['cprofile'] = [{
+                'function': f'{filename}:{line}({function})',
+                'calls': calls,
+                'total_ms': round(total * 1000, 3),
+                'cumulative_ms': round(cumulative * 1000, 3)
+            } for (filename, line, function), (_, calls, total, cumulative, _) in top]
+        
+        if snapshot is not None:
+            trace['tracemalloc'] = {
+                'peak_kb': round(peak_memory / 1024, 1),
+                'top': [{
+                    'location': f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}',
+                    'size_kb': round(stat.size / 1024, 1),
+                    'count': stat.count
+                } for stat in snapshot.statistics('lineno')[:40]]
+            }
+        
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(trace, f, indent=1)
+
+def span(name: str, detail: Optional[Dict] = None, **attrs):
+    """A span in the trace being recorded, or a no-op when not profiling"""
+    trace = current_trace.get()
+    return trace.span(name, detail, **attrs) if trace is not None else contextlib.nullcontext()
+
+def profiled(func: Callable, *args):
+    """Call func, under cProfile if the trace being recorded asked for it"""
+    trace = current_trace.get()
+    return trace.profile_call(func, *args) if trace is not None else func(*args)
+
+class Metrics:
+    """
+    In-process counters, gauges and latency histograms, rendered in the
+    Prometheus text exposition format. Thread-safe and cheap enough for
+    every request and query.
+    """
+    
+    def __init__(self, buckets: tuple = METRIC_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.values = {}        # (name, labels) -> counter or gauge value
+        self.histograms = {}    # (name, labels) -> [count per bucket..., sum, count]
+    
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+    
+    def set(self, name: str, value: float, **labels):
+        with self.lock:
+            self.values[(name, tuple(sorted(labels.items())))] = value
+    
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[i] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+    
+    @contextlib.contextmanager
+    def timer(self, name: str, attrs: Optional[Dict] = None, **labels):
+        """
+        Observe how long the block takes, even if it raises. The block is
+        also a trace span when profiling, with attrs as extra detail.
+        """
+        start = time.perf_counter()
+        try:
+            with span(name[len('fgc_'):-len('_seconds')], attrs, **labels):
+                yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+    
+    def timed(self, name: str):
+        """Decorator timing a function into a histogram labelled with its name"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, method=func.__name__):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+    
+    @staticmethod
+    def _labels(labels: tuple) -> str:
+        if not labels:
+            return ''
+        escaped = []
+        for key, value in labels:
+            value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            escaped.append(f'{key}="{value}"')
+        return '{' + ','.join(escaped) + '}'
+    
+    def render(self) -> str:
+        """All metrics in the Prometheus text format"""
+        with self.lock:
+            values = sorted(self.values.items())
+            histograms = sorted((key, list(value)) for key, value in self.histograms.items())
+        
+        lines = []
+        described = set()
+        
+        def describe(name):
+            if name not in described:
+                described.add(name)
+                kind, text = METRIC_DEFINITIONS.get(name, ('untyped', ''))
+                lines.append(f'# HELP {name} {text}')
+                lines.append(f'# TYPE {name} {kind}')
+        
+        for (name, labels), value in values:
+            describe(name)
+            lines.append(f'{name}{self._labels(labels)} {value}')
+        
+        for (name, labels), histogram in histograms:
+            describe(name)
+            for bound, count in zip(self.buckets, histogram):
+                lines.append(f'{name}_bucket{self._labels(labels + (("le", bound),))} {count}')
+            lines.append(f'{name}_bucket{self._labels(labels + (("le", "+Inf"),))} {histogram[-1]}')
+            lines.append(f'{name}_sum{self._labels(labels)} {round(histogram[-2], 6)}')
+            lines.append(f'{name}_count{self._labels(labels)} {histogram[-1]}')
+        
+        return '\n'.join(lines) + '\n'
+
+# Process-wide registry, exported by web.py at /metrics
+METRICS = Metrics()
+
+class RunStats:
+    """Per-store totals for one check, saved as a row in the runs table"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        self.start = time.monotonic()
+        self.stores = {}
+    
+    def add(self, store: str, **values):
+        with self.lock:
+            totals = self.stores.setdefault(store, {})
+            for key, value in values.items():
+                totals[key] = totals.get(key, 0) + value
+    
+    def update(self, store: str, **values):
+        with self.lock:
+            self.stores.setdefault(store, {}).update(values)
+    
+    def duration(self) -> float:
+        return time.monotonic() - self.start
+
+# Only the parts of each listing page a scraper reads get built into a tree.
+# Set STRAIN_HTML = False to parse whole documents (e.g. when debugging a
+# store that changed its markup).
+STRAIN_HTML = True
+def has_class(name: str):
+    """SoupStrainer class matcher; strainers see the raw, unsplit class attribute"""
+    return lambda value: bool(value) and name in value.split()
+
+# (tag names, class matcher) for SoupStrainers, built on first use by strainer()
+STEAMDB_TABLE = ('table', has_class('table'))
+STEAM_SEARCH_ROWS = ('a', has_class('search_result_row'))
+GOG_PRODUCT_TILES = ('a', lambda x: x and 'product-tile' in x)
+ITCH_GAME_CELLS = ('div', has_class('game_cell'))
+XBOX_PRODUCT_CARDS = (('div', 'article'), lambda x: x and ('product' in x.lower() or 'game' in x.lower()))
+
+@functools.lru_cache(maxsize=None)
+def strainer(spec: tuple) -> bs4.SoupStrainer:
+    name, class_ = spec
+    return bs4.SoupStrainer(list(name) if isinstance(name, tuple) else name, class_=class_)
+
+# Selectors are compiled once, on first use, instead of per-element lambda matchers
+GOG_TILE_SELECTOR = 'a[class*="product-tile"]'
+GOG_TITLE_SELECTOR = ':is(span, div)[class*="title" i]'
+XBOX_CARD_SELECTOR = ':is(div, article):is([class*="product" i], [class*="game" i])'
+XBOX_TITLE_SELECTOR = ':is(h3, h4, h2, a)'
+XBOX_PRICE_SELECTOR = ':is(span, div)[class*="price" i]'
+
+@functools.lru_cache(maxsize=None)
+def css(selector: str) -> soupsieve.SoupSieve:
+    return soupsieve.compile(selector)
+
+def parse_html(content: bytes, only: Optional[tuple] = None) -> bs4.BeautifulSoup:
+    """Parse HTML with the fastest available parser, keeping only the strained elements"""
+    with METRICS.timer('fgc_parse_seconds', store=current_store.get()):
+        only = strainer(only) if only and STRAIN_HTML else None
+        return bs4.BeautifulSoup(content, HTML_PARSER, parse_only=only)
+
+class HttpCache:
+    """
+    On-disk conditional-GET cache.
+    
+    For every URL we keep the response validators (ETag / Last-Modified)
+    and the game list the scraper parsed from it. When the server answers
+    304 the scraper reuses that game list without downloading or parsing.
+    Entries without a game list are never revalidated, so a 304 always has
+    games to hand back.
+    """
+    
+    def __init__(self, cache_dir: str = HTTP_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+    
+    def _path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode('utf-8')).hexdigest())
+    
+    def load(self, url: str) -> Optional[Dict]:
+        """Get the cached entry for a URL, or None if there isn't a usable one"""
+        try:
+            with open(self._path(url) + '.json', 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if entry.get('url') != url or not (entry.get('etag') or entry.get('last_modified')):
+            return None
+        if not isinstance(entry.get('games'), list):
+            return None
+        return entry
+    
+    def save(self, url: str, response: requests.Response, games: List[Dict]):
+        """Store validators and parsed games for a URL"""
+        entry = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'stored_at': datetime.utcnow().isoformat(),
+            'games': games
+        }
+        if not (entry['etag'] or entry['last_modified']):
+            return
+        
+        try:
+            write_atomic(self._path(url) + '.json', json.dumps(entry).encode('utf-8'))
+        except OSError as e:
+            logger.warning(f"Could not write HTTP cache entry for {url}: {e}")
+
+def process_alive(pid: Optional[int]) -> bool:
+    """Whether a process with this pid is running on this machine"""
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def write_atomic(path: str, data: bytes):
+    """Write a file so readers never see it half-written"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+class MetadataCache:
+    """Small on-disk JSON cache of per-key metadata with a time-to-live"""
+    
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.dirty = False
+        try:
+            with open(self.path, 'r') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """Get a fresh entry, or None if missing or expired"""
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry and time.time() - entry['stored_at'] < self.ttl:
+            return entry['data']
+        return None
+    
+    def put(self, key: str, data: Dict):
+        with self.lock:
+            self.entries[key] = {'stored_at': time.time(), 'data': data}
+            self.dirty = True
+    
+    def save(self):
+        """Write changes to disk, dropping expired entries"""
+        with self.lock:
+            if not self.dirty:
+                return
+            now = time.time()
+            self.entries = {key: entry for key, entry in self.entries.items()
+                            if now - entry['stored_at'] < self.ttl}
+            data = json.dumps(self.entries).encode('utf-8')
+            self.dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            write_atomic(self.path, data)
+        except OSError as e:
+            logger.warning(f"Could not save {self.path}: {e}")
+
+class RateLimited(IOError):
+    """A host's rate limit or Retry-After would hold a request for longer than max_rate_wait"""
+
+class HostRateLimiter:
+    """
+    Token bucket per host, shared by every scraper and scraper thread.
+    
+    Each host gets rate_limit requests per second with bursts of up to
+    rate_burst. A 429 (or 503 with Retry-After) pauses the whole host until
+    the server says it may be retried, and with respect_robots a slower
+    robots.txt Crawl-delay or Request-rate takes precedence. Buckets
+    outlive configure(), so a host that pushed back stays paused across
+    checks.
+    """
+    
+    def __init__(self, http_config: Dict = DEFAULT_HTTP_CONFIG):
+        self.lock = threading.Lock()
+        self.buckets = {}           # host -> (tokens, monotonic time they were counted at)
+        self.paused_until = {}      # host -> monotonic time it may be requested again
+        self.crawl_delays = {}      # host -> robots.txt delay in seconds, None if it sets none
+        self.configure(http_config)
+    
+    def configure(self, http_config: Dict):
+        self.rate = http_config['rate_limit']
+        self.burst = max(1, http_config['rate_burst'])
+        self.host_rates = http_config['host_rate_limits']
+        self.max_wait = http_config['max_rate_wait']
+        self.respect_robots = http_config['respect_robots']
+    
+    @staticmethod
+    def host(url: str) -> str:
+        return urlsplit(url).netloc.lower()
+    
+    def rate_for(self, host: str) -> tuple:
+        """(requests per second, burst) for host; a robots.txt delay allows no bursts"""
+        rate = self.host_rates.get(host, self.rate)
+        delay = self.crawl_delays.get(host)
+        if delay and (not rate or 1 / delay < rate):
+            return 1 / delay, 1
+        return rate, self.burst
+    
+    def reserve(self, host: str) -> float:
+        """Take a token for host; returns how long to sleep before using it"""
+        now = time.monotonic()
+        with self.lock:
+            wait = max(0.0, self.paused_until.get(host, 0) - now)
+            rate, burst = self.rate_for(host)
+            if rate:
+                tokens, counted_at = self.buckets.get(host, (burst, now))
+                # Before a pause ends (counted_at in the future) this goes negative
+                tokens = min(burst, tokens + (now - counted_at) * rate) - 1
+                if tokens < 0:
+                    wait = max(wait, -tokens / rate)
+                if wait > self.max_wait:
+                    raise RateLimited(f"{host} is rate limited for another {wait:.0f}s")
+                self.buckets[host] = (tokens, now)
+            elif wait > self.max_wait:
+                raise RateLimited(f"{host} is rate limited for another {wait:.0f}s")
+            return wait
+    
+    def acquire(self, url: str):
+        """Block until a request to url's host is allowed"""
+        host = self.host(url)
+        if self.respect_robots:
+            self.load_robots(url, host)
+        wait = self.reserve(host)
+        METRICS.observe('fgc_http_rate_limit_wait_seconds', wait, store=current_store.get())
+        if wait:
+            time.sleep(wait)
+    
+    def pause(self, host: str, seconds: float):
+        """Hold every request to host for seconds, then let them through at the normal rate"""
+        until = time.monotonic() + seconds
+        with self.lock:
+            if until <= self.paused_until.get(host, 0):
+                return
+            self.paused_until[host] = until
+            if self.rate_for(host)[0]:
+                # One token at the end of the pause; later requests are spaced out after it
+                self.buckets[host] = (1, until)
+    
+    def throttled(self, response: requests.Response, backoff: float) -> Optional[float]:
+        """
+        If the response asks us to slow down, pause its host and return for
+        how long; otherwise None. Without a Retry-After header the pause is
+        backoff seconds.
+        """
+        retry_after = response.headers.get('Retry-After')
+        if response.status_code != 429 and not (response.status_code == 503 and retry_after):
+            return None
+        
+        seconds = backoff
+        if retry_after:
+            try:
+                seconds = float(retry_after)
+            except ValueError:
+                from email.utils import parsedate_to_datetime
+                try:
+                    retry_at = parsedate_to_datetime(retry_after)
+                    seconds = (retry_at - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    pass
+        seconds = max(0.0, seconds)
+        
+        host = self.host(response.url)
+        logger.warning(f"{host} answered {response.status_code}, pausing it for {seconds:.0f}s")
+        METRICS.inc('fgc_http_throttled_total', store=current_store.get())
+        self.pause(host, seconds)
+        return seconds
+    
+    def load_robots(self, url: str, host: str):
+        """Read host's robots.txt once per process for its Crawl-delay"""
+        with self.lock:
+            if host in self.crawl_delays:
+                return
+            # Claimed up front so concurrent requests don't all fetch it
+            self.crawl_delays[host] = None
+        
+        from urllib.robotparser import RobotFileParser
+        
+        robots_url = f"{urlsplit(url).scheme}://{host}/robots.txt"
+        parser = RobotFileParser(robots_url)
+        try:
+            time.sleep(self.reserve(host))
+            response = GameScraper.session().get(robots_url, timeout=GameScraper.http_config['timeout'])
+            if response.status_code != 200:
+                return
+            parser.parse(response.text.splitlines())
+            parser.modified()   # crawl_delay() ignores a parser that was never marked as read
+        except requests.RequestException as e:
+            logger.debug(f"Could not read {robots_url}: {e}")
+            return
+        
+        delay = parser.crawl_delay('*')
+        request_rate = parser.request_rate('*')
+        if request_rate and request_rate.requests:
+            delay = max(float(delay or 0), request_rate.seconds / request_rate.requests)
+        if delay:
+            logger.info(f"{host}: robots.txt asks for {float(delay):g}s between requests")
+            with self.lock:
+                self.crawl_delays[host] = float(delay)
+
+def run_async(coro):
+    """
+    Run a coroutine on a new event loop, like asyncio.run, but without
+    waiting for to_thread work that is still running when it returns.
+    asyncio.run joins the default executor on shutdown, so a store that
+    was abandoned at its deadline would still hold up the caller until its
+    blocking request returned. The loop gets its own executor, which is
+    shut down like run_scrapers' pool instead.
+    """
+    loop = asyncio.new_event_loop()
+    executor = ThreadPoolExecutor(thread_name_prefix='async-worker')
+    loop.set_default_executor(executor)
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        try:
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            loop.close()
+
 class GameScraper:
     """Base class for game store scrapers"""
     
+    # One pooled session shared by every scraper (and every scraper thread)
+    http_config = dict(DEFAULT_HTTP_CONFIG)
+    http_cache = None
+    rate_limiter = HostRateLimiter()
+    _session = None
+    _session_lock = threading.Lock()
+    
     def __init__(self, store_name: str, platform: str = 'PC'):
         self.store_name = store_name
         self.platform = platform
@@ -57,10 +730,288 @@ class GameScraper:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
     
+    @classmethod
+    def configure_http(cls, config: Dict):
+        """Apply the "http" section of config.json and rebuild the shared session"""
+        http_config = dict(DEFAULT_HTTP_CONFIG)
+        http_config.update(config.get('http', {}))
+        
+        http_cache = None
+        if config.get('http_cache', True):
+            try:
+                http_cache = HttpCache(config.get('http_cache_dir', HTTP_CACHE_DIR))
+            except OSError as e:
+                logger.warning(f"HTTP cache disabled: {e}")
+        
+        with cls._session_lock:
+            old_session = cls._session
+            GameScraper.http_config = http_config
+            GameScraper.http_cache = http_cache
+            GameScraper.rate_limiter.configure(http_config)
+            GameScraper._session = None
+        
+        if old_session is not None:
+            old_session.close()
+    
+    @classmethod
+    def session(cls) -> requests.Session:
+        """Get the shared keep-alive session, creating it on first use"""
+        with cls._session_lock:
+            if GameScraper._session is None:
+                GameScraper._session = cls._build_session(GameScraper.http_config)
+            return GameScraper._session
+    
+    @staticmethod
+    def _build_session(http_config: Dict) -> requests.Session:
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        from urllib3.util.request import ACCEPT_ENCODING
+        
+        class TransportRetry(Retry):
+            """
+            Retries connection errors and retry_statuses, but hands any
+            response carrying Retry-After back to GameScraper.get, which
+            pauses the host in the shared rate limiter instead of sleeping
+            in this thread.
+            """
+            def is_retry(self, method, status_code, has_retry_after=False):
+                return not has_retry_after and super().is_retry(method, status_code, has_retry_after)
+        
+        retry = TransportRetry(
+            total=http_config['retries'],
+            backoff_factor=http_config['backoff_factor'],
+            status_forcelist=http_config['retry_statuses'],
+            allowed_methods=['GET', 'HEAD'],
+            respect_retry_after_header=False,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=http_config['pool_connections'],
+            pool_maxsize=http_config['pool_maxsize'],
+            pool_block=http_config['pool_block'],
+            max_retries=retry
+        )
+        
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        # Advertises br only when a brotli decoder is installed
+        session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        return session
+    
+    def get(self, url: str, conditional: bool = False, **kwargs) -> requests.Response:
+        """
+        GET through the shared session with this scraper's headers and default timeout.
+        
+        Requests wait for their host's rate limit. A 429 pauses the host
+        (for Retry-After if given) and is retried up to http.retries times.
+        
+        With conditional=True the request carries the cached validators for
+        the URL. A 304 answer comes back with the previously parsed games in
+        response.cached_games; call cache_games() after parsing a 200.
+        """
+        headers = dict(self.headers)
+        headers.update(kwargs.pop('headers', {}))
+        kwargs.setdefault('timeout', self.http_config['timeout'])
+        
+        entry = None
+        cache_key = None
+        if conditional and self.http_cache is not None:
+            cache_key = requests.Request('GET', url, params=kwargs.get('params')).prepare().url
+            entry = self.http_cache.load(cache_key)
+            if entry:
+                if entry.get('etag'):
+                    headers['If-None-Match'] = entry['etag']
+                if entry.get('last_modified'):
+                    headers['If-Modified-Since'] = entry['last_modified']
+        
+        try:
+            for attempt in range(self.http_config['retries'] + 1):
+                self.rate_limiter.acquire(url)
+                with METRICS.timer('fgc_http_request_seconds', attrs={'url': url}, store=self.store_name):
+                    response = self.session().get(url, headers=headers, **kwargs)
+                
+                backoff = self.http_config['backoff_factor'] * 2 ** attempt
+                if (self.rate_limiter.throttled(response, backoff) is None
+                        or attempt == self.http_config['retries']):
+                    break
+                METRICS.inc('fgc_http_requests_total', store=self.store_name, status=response.status_code)
+                response.close()
+        except (requests.RequestException, RateLimited) as e:
+            METRICS.inc('fgc_http_errors_total', store=self.store_name)
+            self.count_download(errors=1)
+            self.record_error(f"{type(e).__name__}: {e}")
+            raise
+        
+        METRICS.inc('fgc_http_requests_total', store=self.store_name, status=response.status_code)
+        # A streamed body is counted as it is read, in stream_elements
+        self.count_download(requests=1, bytes=0 if kwargs.get('stream') else len(response.content))
+        if response.status_code >= 400:
+            self.count_download(errors=1)
+            self.record_error(f"HTTP {response.status_code} from {url}")
+        response.cache_key = cache_key
+        response.cached_games = None
+        
+        if response.status_code == 304 and entry is not None:
+            response.cached_games = entry['games']
+            logger.info(f"{self.store_name}: {url} not modified, reusing {len(response.cached_games)} cached games")
+        return response
+    
+    def count_download(self, **totals):
+        """Add to this store's downloaded bytes (and the current run's totals)"""
+        if totals.get('bytes'):
+            METRICS.inc('fgc_http_downloaded_bytes_total', totals['bytes'], store=self.store_name)
+        run = current_run.get()
+        if run is not None:
+            run.add(self.store_name, **totals)
+    
+    def record_error(self, error: str):
+        """Remember the latest request error for this store's health record"""
+        run = current_run.get()
+        if run is not None:
+            run.update(self.store_name, error=error[:300])
+    
+    def cache_games(self, response: requests.Response, games: List[Dict]):
+        """Remember the games parsed from a conditional GET for the next 304"""
+        if getattr(response, 'cache_key', None) and response.status_code == 200:
+            self.http_cache.save(response.cache_key, response, games)
+    
+    @property
+    def streaming(self) -> bool:
+        """Whether listing pages should be parsed incrementally as they download"""
+        return self.http_config['stream']
+    
+    def stream_elements(self, response: requests.Response, tag: str, css_class: str,
+                        limit: Optional[int] = None) -> Iterator:
+        """
+        Yield matching elements while the page is still downloading.
+        
+        The body is fed chunk by chunk to an ElementStreamParser and each
+        <tag class="css_class"> is yielded as a BeautifulSoup tag as soon as
+        it is closed. The connection is closed once limit elements have been
+        yielded or the consumer stops iterating, so the rest of the page is
+        never downloaded. Open with get(..., stream=True).
+        """
+        content_type = response.headers.get('Content-Type', '').lower()
+        encoding = response.encoding if 'charset' in content_type else 'utf-8'
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        parser = ElementStreamParser(tag, css_class)
+        found = 0
+        
+        def completed_elements():
+            # Everything that closed in this chunk is parsed in one go
+            fragments = parser.pop_elements()
+            if not fragments:
+                return []
+            soup = parse_html(''.join(fragments))
+            return (soup.body or soup).find_all(tag, recursive=False)
+        
+        try:
+            for chunk in response.iter_content(chunk_size=self.http_config['stream_chunk_size']):
+                self.count_download(bytes=len(chunk))
+                parser.feed(decoder.decode(chunk))
+                for element in completed_elements():
+                    yield element
+                    found += 1
+                    if limit is not None and found >= limit:
+                        return
+            
+            parser.feed(decoder.decode(b'', final=True))
+            parser.close()
+            for element in completed_elements():
+                yield element
+                found += 1
+                if limit is not None and found >= limit:
+                    return
+        finally:
+            response.close()
+    
     def scrape(self) -> List[Dict]:
         """Override this method in subclasses"""
         raise NotImplementedError
+    
+    async def scrape_async(self) -> List[Dict]:
+        """
+        Awaitable scrape() for the async engine. There is no async HTTP
+        client in requirements.txt, so the blocking scrape runs on the event
+        loop's thread pool through the shared session. The thread engine
+        calls scrape() directly and never starts an event loop.
+        """
+        return await asyncio.to_thread(self.scrape)
+    
+    @staticmethod
+    def concurrently(pool: ThreadPoolExecutor, function: Callable, *iterables) -> Iterator:
+        """pool.map(function, *iterables), with each call in a copy of this thread's context"""
+        context = contextvars.copy_context()
+        return pool.map(lambda *args: context.copy().run(function, *args), *iterables)
+
+# Store name -> scraper class for every built-in store. Scrapers are only
+# instantiated (by build_scrapers) for the stores that are enabled.
+SCRAPERS: Dict[str, type] = {}
+
+def register_scraper(store_name: str):
+    """Class decorator adding a built-in scraper to SCRAPERS"""
+    def register(cls: type) -> type:
+        SCRAPERS[store_name] = cls
+        return cls
+    return register
+
+class ElementStreamParser(HTMLParser):
+    """
+    Incremental tokenizer that cuts <tag class="css_class"> elements out of
+    a page as it arrives. Only the markup of matching elements is kept; the
+    rest of the document is tokenized and thrown away.
+    """
+    
+    def __init__(self, tag: str, css_class: str):
+        super().__init__(convert_charrefs=False)
+        self.tag = tag
+        self.css_class = css_class
+        self.depth = 0          # open <tag> elements inside the current match
+        self.buffer = []
+        self.completed = []
+    
+    def pop_elements(self) -> List[str]:
+        """Take the markup of every element that closed since the last call"""
+        completed, self.completed = self.completed, []
+        return completed
+    
+    def handle_starttag(self, tag, attrs):
+        if self.depth:
+            self.buffer.append(self.get_starttag_text())
+            if tag == self.tag:
+                self.depth += 1
+        elif tag == self.tag and self.css_class in (dict(attrs).get('class') or '').split():
+            self.buffer = [self.get_starttag_text()]
+            self.depth = 1
+    
+    def handle_startendtag(self, tag, attrs):
+        if self.depth:
+            self.buffer.append(self.get_starttag_text())
+    
+    def handle_endtag(self, tag):
+        if not self.depth:
+            return
+        self.buffer.append(f'</{tag}>')
+        if tag == self.tag:
+            self.depth -= 1
+            if not self.depth:
+                self.completed.append(''.join(self.buffer))
+                self.buffer = []
+    
+    def handle_data(self, data):
+        if self.depth:
+            self.buffer.append(data)
+    
+    def handle_entityref(self, name):
+        if self.depth:
+            self.buffer.append(f'&{name};')
+    
+    def handle_charref(self, name):
+        if self.depth:
+            self.buffer.append(f'&#{name};')
 
+@register_scraper('Epic Games Store')
 class EpicGamesScraper(GameScraper):
     """Epic Games Store - Weekly free games"""
     
@@ -70,8 +1021,10 @@ class EpicGamesScraper(GameScraper):
     
     def scrape(self) -> List[Dict]:
         try:
-            response = requests.get(self.api_url, headers=self.headers, timeout=10)
+            response = self.get(self.api_url, conditional=True)
             response.raise_for_status()
+            if response.cached_games is not None:
+                return response.cached_games
             data = response.json()
             
             games = []
@@ -116,6 +1069,7 @@ class EpicGamesScraper(GameScraper):
                                 'store_logo': 'https://cdn2.unrealengine.com/epic-games-logo-400x400-400x400-8b560c1e48a1.png'
                             })
             
+            self.cache_games(response, games)
             logger.info(f"Found {len(games)} free games on Epic Games Store")
             return games
             
@@ -123,6 +1077,7 @@ class EpicGamesScraper(GameScraper):
             logger.error(f"Error scraping Epic Games Store: {e}")
             return []
 
+@register_scraper('Steam')
 class SteamScraper(GameScraper):
     """Steam - Free to Keep games + 100% discount deals"""
     
@@ -131,135 +1086,166 @@ class SteamScraper(GameScraper):
     
     def scrape(self) -> List[Dict]:
         try:
-            games = []
+            # Both sources are fetched at the same time
+            with ThreadPoolExecutor(max_workers=2, thread_name_prefix='steam') as pool:
+                steamdb = pool.submit(contextvars.copy_context().run, self.scrape_steamdb)
+                store_search = pool.submit(contextvars.copy_context().run, self.scrape_store_search)
+                games, store_games = steamdb.result(), store_search.result()
             
-            # METHOD 1: SteamDB's Free to Keep page (official promotions)
-            try:
-                url = "https://steamdb.info/upcoming/free/"
-                response = requests.get(url, headers=self.headers, timeout=10)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Find the table with free to keep games
-                table = soup.find('table', class_='table')
-                if table:
-                    rows = table.find_all('tr')[1:]  # Skip header
-                    
-                    for row in rows[:10]:  # Limit to 10
-                        try:
-                            cols = row.find_all('td')
-                            if len(cols) < 3:
-                                continue
-                            
-                            # Get game name
-                            name_cell = cols[1]
-                            title_link = name_cell.find('a')
-                            if not title_link:
-                                continue
-                            
-                            title = title_link.get_text().strip()
-                            app_id = title_link.get('href', '').split('/')[-2] if '/' in title_link.get('href', '') else ''
-                            
-                            # Get end date
-                            date_cell = cols[2] if len(cols) > 2 else None
-                            end_date = date_cell.get_text().strip() if date_cell else ''
-                            
-                            # Construct Steam store URL
-                            game_url = f"https://store.steampowered.com/app/{app_id}/" if app_id else "https://store.steampowered.com"
-                            
-                            # Try to get image from Steam API
-                            image_url = f"https://cdn.cloudflare.steamstatic.com/steam/apps/{app_id}/header.jpg" if app_id else ''
-                            
-                            games.append({
-                                'title': title,
-                                'store': self.store_name,
-                                'platform': self.platform,
-                                'description': 'Free to Keep! Claim now and keep forever. Official Steam promotion.',
-                                'image_url': image_url,
-                                'game_url': game_url,
-                                'original_price': 'Was Paid',
-                                'end_date': end_date,
-                                'store_logo': 'https://store.cloudflare.steamstatic.com/public/shared/images/header/logo_steam.svg'
-                            })
-                        except Exception as e:
-                            logger.warning(f"Error parsing SteamDB game: {e}")
-                            continue
-            except Exception as e:
-                logger.warning(f"Error scraping SteamDB: {e}")
+            # Skip games already added from SteamDB
+            for game in store_games:
+                if not any(g['title'] == game['title'] for g in games):
+                    games.append(game)
             
-            # METHOD 2: Steam Store direct - 100% discount search
-            try:
-                # Search for games on sale with max discount
-                search_url = "https://store.steampowered.com/search/?maxprice=free&specials=1&ndl=1"
-                response = requests.get(search_url, headers=self.headers, timeout=10)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Find game results
-                search_results = soup.find_all('a', class_='search_result_row', limit=20)
+            logger.info(f"Found {len(games)} free games on Steam (SteamDB + Store)")
+            return games
+            
+        except Exception as e:
+            logger.error(f"Error scraping Steam: {e}")
+            return []
+    
+    def scrape_steamdb(self) -> List[Dict]:
+        """METHOD 1: SteamDB's Free to Keep page (official promotions)"""
+        games = []
+        try:
+            url = "https://steamdb.info/upcoming/free/"
+            response = self.get(url, conditional=True)
+            response.raise_for_status()
+            
+            if response.cached_games is not None:
+                return response.cached_games
+            
+            soup = parse_html(response.content, STEAMDB_TABLE)
+            
+            # Find the table with free to keep games
+            table = soup.find('table', class_='table')
+            if table:
+                rows = table.find_all('tr')[1:]  # Skip header
                 
-                for result in search_results:
+                for row in rows[:10]:  # Limit to 10
                     try:
-                        # Check if it has a discount
-                        discount_pct = result.find('div', class_='discount_pct')
-                        if not discount_pct:
-                            continue
-                        
-                        discount_text = discount_pct.get_text().strip()
-                        
-                        # Only keep 100% discounts (was paid, now free)
-                        if '-100%' not in discount_text:
+                        cols = row.find_all('td')
+                        if len(cols) < 3:
                             continue
                         
-                        # Get title
-                        title_elem = result.find('span', class_='title')
-                        if not title_elem:
+                        # Get game name
+                        name_cell = cols[1]
+                        title_link = name_cell.find('a')
+                        if not title_link:
                             continue
-                        title = title_elem.get_text().strip()
                         
-                        # Skip if already added from SteamDB
-                        if any(g['title'] == title for g in games):
-                            continue
+                        title = title_link.get_text().strip()
+                        app_id = title_link.get('href', '').split('/')[-2] if '/' in title_link.get('href', '') else ''
                         
-                        # Get URL
-                        game_url = result.get('href', '').split('?')[0]  # Remove URL parameters
+                        # Get end date
+                        date_cell = cols[2] if len(cols) > 2 else None
+                        end_date = date_cell.get_text().strip() if date_cell else ''
                         
-                        # Get image
-                        img = result.find('img')
-                        image_url = img.get('src', '') if img else ''
+                        # Construct Steam store URL
+                        game_url = f"https://store.steampowered.com/app/{app_id}/" if app_id else "https://store.steampowered.com"
                         
-                        # Get original price
-                        original_price_elem = result.find('div', class_='discount_original_price')
-                        original_price = original_price_elem.get_text().strip() if original_price_elem else 'Was Paid'
+                        # Try to get image from Steam API
+                        image_url = f"https://cdn.cloudflare.steamstatic.com/steam/apps/{app_id}/header.jpg" if app_id else ''
                         
                         games.append({
                             'title': title,
                             'store': self.store_name,
                             'platform': self.platform,
-                            'description': '100% OFF! Was paid, now completely free on Steam.',
+                            'description': 'Free to Keep! Claim now and keep forever. Official Steam promotion.',
                             'image_url': image_url,
                             'game_url': game_url,
-                            'original_price': original_price,
-                            'end_date': 'Limited time',
+                            'original_price': 'Was Paid',
+                            'end_date': end_date,
                             'store_logo': 'https://store.cloudflare.steamstatic.com/public/shared/images/header/logo_steam.svg'
                         })
-                        
                     except Exception as e:
-                        logger.warning(f"Error parsing Steam store game: {e}")
+                        logger.warning(f"Error parsing SteamDB game: {e}")
                         continue
-                        
-            except Exception as e:
-                logger.warning(f"Error scraping Steam store: {e}")
+                
+                
+                self.cache_games(response, games)
+        except Exception as e:
+            logger.warning(f"Error scraping SteamDB: {e}")
+        return games
+    
+    def scrape_store_search(self) -> List[Dict]:
+        """METHOD 2: Steam Store direct - 100% discount search"""
+        try:
+            # Search for games on sale with max discount
+            search_url = "https://store.steampowered.com/search/?maxprice=free&specials=1&ndl=1"
+            response = self.get(search_url, conditional=True, stream=self.streaming)
+            response.raise_for_status()
             
-            logger.info(f"Found {len(games)} free games on Steam (SteamDB + Store)")
-            return games
+            if response.cached_games is not None:
+                return response.cached_games
+            
+            # Find game results, stopping the download after 20 rows when streaming
+            if self.streaming:
+                search_results = self.stream_elements(response, 'a', 'search_result_row', limit=20)
+            else:
+                soup = parse_html(response.content, STEAM_SEARCH_ROWS)
+                search_results = soup.find_all('a', class_='search_result_row', limit=20)
+            
+            store_games = self.parse_search_results(search_results)
+            self.cache_games(response, store_games)
+            return store_games
             
         except Exception as e:
-            logger.error(f"Error scraping Steam: {e}")
+            logger.warning(f"Error scraping Steam store: {e}")
             return []
+    
+    def parse_search_results(self, search_results) -> List[Dict]:
+        """Turn search_result_row anchors into games, keeping only 100% discounts"""
+        store_games = []
+        for result in search_results:
+            try:
+                # Check if it has a discount
+                discount_pct = result.find('div', class_='discount_pct')
+                if not discount_pct:
+                    continue
+                
+                discount_text = discount_pct.get_text().strip()
+                
+                # Only keep 100% discounts (was paid, now free)
+                if '-100%' not in discount_text:
+                    continue
+                
+                # Get title
+                title_elem = result.find('span', class_='title')
+                if not title_elem:
+                    continue
+                title = title_elem.get_text().strip()
+                
+                # Get URL
+                game_url = result.get('href', '').split('?')[0]  # Remove URL parameters
+                
+                # Get image
+                img = result.find('img')
+                image_url = img.get('src', '') if img else ''
+                
+                # Get original price
+                original_price_elem = result.find('div', class_='discount_original_price')
+                original_price = original_price_elem.get_text().strip() if original_price_elem else 'Was Paid'
+                
+                store_games.append({
+                    'title': title,
+                    'store': self.store_name,
+                    'platform': self.platform,
+                    'description': '100% OFF! Was paid, now completely free on Steam.',
+                    'image_url': image_url,
+                    'game_url': game_url,
+                    'original_price': original_price,
+                    'end_date': 'Limited time',
+                    'store_logo': 'https://store.cloudflare.steamstatic.com/public/shared/images/header/logo_steam.svg'
+                })
+                
+            except Exception as e:
+                logger.warning(f"Error parsing Steam store game: {e}")
+                continue
+        
+        return store_games
 
+@register_scraper('GOG')
 class GOGScraper(GameScraper):
     """GOG - Free games (rare)"""
     
@@ -270,18 +1256,20 @@ class GOGScraper(GameScraper):
         try:
             # GOG occasionally offers free games
             url = "https://www.gog.com/en/games?priceRange=0,0&discounted=true"
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.get(url, conditional=True)
             response.raise_for_status()
+            if response.cached_games is not None:
+                return response.cached_games
             
             games = []
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parse_html(response.content, GOG_PRODUCT_TILES)
             
             # GOG uses dynamic content, check for product cards
-            product_cards = soup.find_all('a', class_=lambda x: x and 'product-tile' in str(x))
+            product_cards = css(GOG_TILE_SELECTOR).select(soup, limit=10)
             
-            for card in product_cards[:10]:
+            for card in product_cards:
                 try:
-                    title_elem = card.find(['span', 'div'], class_=lambda x: x and 'title' in str(x).lower())
+                    title_elem = css(GOG_TITLE_SELECTOR).select_one(card)
                     if title_elem:
                         title = title_elem.get_text().strip()
                         game_url = urljoin('https://www.gog.com', card.get('href', ''))
@@ -304,6 +1292,7 @@ class GOGScraper(GameScraper):
                     logger.warning(f"Error parsing GOG game: {e}")
                     continue
             
+            self.cache_games(response, games)
             logger.info(f"Found {len(games)} free games on GOG")
             return games
             
@@ -311,6 +1300,7 @@ class GOGScraper(GameScraper):
             logger.error(f"Error scraping GOG: {e}")
             return []
 
+@register_scraper('Humble Bundle')
 class HumbleBundleScraper(GameScraper):
     """Humble Bundle - Rare free game giveaways"""
     
@@ -323,16 +1313,18 @@ class HumbleBundleScraper(GameScraper):
             # They occasionally do giveaways on their store
             # Check main store page for any promotions
             url = "https://www.humblebundle.com/store"
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.get(url, conditional=True)
             response.raise_for_status()
+            if response.cached_games is not None:
+                return response.cached_games
             
             games = []
-            soup = BeautifulSoup(response.content, 'html.parser')
             
             # Look for any free promotions (this is rare)
             # Humble Bundle structure varies, so this is a basic check
             # Users should also check manually as these are rare events
             
+            self.cache_games(response, games)
             logger.info(f"Checked Humble Bundle for free games (rare)")
             return games
             
@@ -340,6 +1332,7 @@ class HumbleBundleScraper(GameScraper):
             logger.error(f"Error scraping Humble Bundle: {e}")
             return []
 
+@register_scraper('Itch.io')
 class ItchIOScraper(GameScraper):
     """Itch.io - Games with 100% discount ONLY (was paid, now free)"""
     
@@ -350,92 +1343,107 @@ class ItchIOScraper(GameScraper):
         try:
             # Itch.io on-sale page - look for 100% off games
             url = "https://itch.io/games/on-sale"
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.get(url, conditional=True, stream=self.streaming)
             response.raise_for_status()
+            if response.cached_games is not None:
+                return response.cached_games
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            games = []
+            # Find all game cells, parsing them as the page downloads when streaming
+            if self.streaming:
+                game_cells = self.stream_elements(response, 'div', 'game_cell')
+            else:
+                game_cells = parse_html(response.content, ITCH_GAME_CELLS).find_all('div', class_='game_cell')
             
-            # Find all game cells
-            game_cells = soup.find_all('div', class_='game_cell')
+            games = self.parse_game_cells(game_cells)
             
-            for cell in game_cells:
-                try:
-                    # Look for the sale badge with -100%
-                    sale_badge = cell.find('div', class_='sale_tag')
-                    
-                    # CRITICAL: Only proceed if it's -100% discount
-                    if not sale_badge:
-                        continue
-                    
-                    badge_text = sale_badge.get_text().strip()
-                    if '-100%' not in badge_text:
-                        continue  # Skip if not 100% off
-                    
-                    # Now we know it's 100% off, get the details
-                    title_tag = cell.find('a', class_='title')
-                    if not title_tag:
-                        continue
-                    
-                    title = title_tag.get_text().strip()
-                    game_url = urljoin('https://itch.io', title_tag.get('href', ''))
-                    
-                    # Get image
-                    img_tag = cell.find('img')
-                    image_url = ''
-                    if img_tag:
-                        image_url = img_tag.get('data-lazy_src', '') or img_tag.get('src', '')
-                    
-                    # Get original price
-                    price_container = cell.find('div', class_='price_value')
-                    original_price = 'Was Paid'
-                    
-                    if price_container:
-                        # Look for original price (before discount)
-                        price_text = price_container.get_text()
-                        # The original price is usually shown before the $0
-                        if '$' in price_text:
-                            import re
-                            prices = re.findall(r'\$[\d.]+', price_text)
-                            if len(prices) >= 2:
-                                original_price = prices[0]  # First price is usually original
-                            elif len(prices) == 1 and '$0' not in prices[0]:
-                                original_price = prices[0]
-                    
-                    # Also check for sale price element
-                    sale_price = cell.find('div', class_='sale_price')
-                    if sale_price and not original_price.startswith('$'):
-                        sale_text = sale_price.get_text().strip()
-                        if '$' in sale_text:
-                            original_price = sale_text.split('$')[1].split()[0]
-                            original_price = f"${original_price}"
-                    
-                    games.append({
-                        'title': title,
-                        'store': self.store_name,
-                        'platform': self.platform,
-                        'description': f'100% OFF! Was {original_price}, now FREE on Itch.io',
-                        'image_url': image_url,
-                        'game_url': game_url,
-                        'original_price': original_price,
-                        'end_date': 'Limited time sale',
-                        'store_logo': 'https://static.itch.io/images/itchio-textless-black.svg'
-                    })
-                    
-                    if len(games) >= 10:
-                        break
-                        
-                except Exception as e:
-                    logger.warning(f"Error parsing Itch.io game: {e}")
-                    continue
+            # Stops the download if we found enough games before the end of the page
+            response.close()
             
+            self.cache_games(response, games)
             logger.info(f"Found {len(games)} games with -100% discount on Itch.io")
             return games
             
         except Exception as e:
             logger.error(f"Error scraping Itch.io: {e}")
             return []
+    
+    def parse_game_cells(self, game_cells) -> List[Dict]:
+        """Turn game_cell divs into games, keeping only -100% discounts (at most 10)"""
+        games = []
+        
+        for cell in game_cells:
+            try:
+                # Look for the sale badge with -100%
+                sale_badge = cell.find('div', class_='sale_tag')
+                
+                # CRITICAL: Only proceed if it's -100% discount
+                if not sale_badge:
+                    continue
+                
+                badge_text = sale_badge.get_text().strip()
+                if '-100%' not in badge_text:
+                    continue  # Skip if not 100% off
+                
+                # Now we know it's 100% off, get the details
+                title_tag = cell.find('a', class_='title')
+                if not title_tag:
+                    continue
+                
+                title = title_tag.get_text().strip()
+                game_url = urljoin('https://itch.io', title_tag.get('href', ''))
+                
+                # Get image
+                img_tag = cell.find('img')
+                image_url = ''
+                if img_tag:
+                    image_url = img_tag.get('data-lazy_src', '') or img_tag.get('src', '')
+                
+                # Get original price
+                price_container = cell.find('div', class_='price_value')
+                original_price = 'Was Paid'
+                
+                if price_container:
+                    # Look for original price (before discount)
+                    price_text = price_container.get_text()
+                    # The original price is usually shown before the $0
+                    if '$' in price_text:
+                        import re
+                        prices = re.findall(r'\$[\d.]+', price_text)
+                        if len(prices) >= 2:
+                            original_price = prices[0]  # First price is usually original
+                        elif len(prices) == 1 and '$0' not in prices[0]:
+                            original_price = prices[0]
+                
+                # Also check for sale price element
+                sale_price = cell.find('div', class_='sale_price')
+                if sale_price and not original_price.startswith('$'):
+                    sale_text = sale_price.get_text().strip()
+                    if '$' in sale_text:
+                        original_price = sale_text.split('$')[1].split()[0]
+                        original_price = f"${original_price}"
+                
+                games.append({
+                    'title': title,
+                    'store': self.store_name,
+                    'platform': self.platform,
+                    'description': f'100% OFF! Was {original_price}, now FREE on Itch.io',
+                    'image_url': image_url,
+                    'game_url': game_url,
+                    'original_price': original_price,
+                    'end_date': 'Limited time sale',
+                    'store_logo': 'https://static.itch.io/images/itchio-textless-black.svg'
+                })
+                
+                if len(games) >= 10:
+                    break
+                    
+            except Exception as e:
+                logger.warning(f"Error parsing Itch.io game: {e}")
+                continue
+        
+        return games
 
+@register_scraper('Nintendo Switch')
 class NintendoSwitchScraper(GameScraper):
     """Nintendo Switch - Only paid games that became free"""
     
@@ -454,8 +1462,10 @@ class NintendoSwitchScraper(GameScraper):
                 'wt': 'json'
             }
             
-            response = requests.get(url, params=params, headers=self.headers, timeout=10)
+            response = self.get(url, conditional=True, params=params)
             response.raise_for_status()
+            if response.cached_games is not None:
+                return response.cached_games
             
             data = response.json()
             games = []
@@ -495,6 +1505,7 @@ class NintendoSwitchScraper(GameScraper):
                         'store_logo': 'https://assets.nintendo.com/image/upload/ncom/en_US/merchandising/misc/nintendo-switch-logo.png'
                     })
             
+            self.cache_games(response, games)
             logger.info(f"Found {len(games)} paid games now free on Nintendo Switch")
             return games
             
@@ -502,6 +1513,7 @@ class NintendoSwitchScraper(GameScraper):
             logger.error(f"Error scraping Nintendo Switch: {e}")
             return []
 
+@register_scraper('Xbox Store')
 class XboxScraper(GameScraper):
     """Xbox - Free game deals (was paid, now $0.00)"""
     
@@ -514,19 +1526,21 @@ class XboxScraper(GameScraper):
             
             # Xbox Australian deals page filtered for free games
             deals_url = "https://www.xbox.com/en-AU/games/browse/DynamicChannel.GameDeals?Price=0"
-            response = requests.get(deals_url, headers=self.headers, timeout=10)
+            response = self.get(deals_url, conditional=True)
+            if response.cached_games is not None:
+                return response.cached_games
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
+                soup = parse_html(response.content, XBOX_PRODUCT_CARDS)
                 
                 # Look for game elements - Xbox uses various structures
                 # Try to find product cards or game listings
-                game_elements = soup.find_all(['div', 'article'], class_=lambda x: x and ('product' in str(x).lower() or 'game' in str(x).lower()))
+                game_elements = css(XBOX_CARD_SELECTOR).select(soup, limit=15)
                 
-                for element in game_elements[:15]:
+                for element in game_elements:
                     try:
                         # Find title
-                        title_elem = element.find(['h3', 'h4', 'h2', 'a'])
+                        title_elem = css(XBOX_TITLE_SELECTOR).select_one(element)
                         if not title_elem:
                             continue
                         
@@ -545,7 +1559,7 @@ class XboxScraper(GameScraper):
                         image_url = img.get('src', '') or img.get('data-src', '') if img else ''
                         
                         # Check for price info
-                        price_elem = element.find(['span', 'div'], class_=lambda x: x and 'price' in str(x).lower())
+                        price_elem = css(XBOX_PRICE_SELECTOR).select_one(element)
                         original_price = 'Was Paid'
                         if price_elem:
                             price_text = price_elem.get_text()
@@ -571,6 +1585,7 @@ class XboxScraper(GameScraper):
                         logger.warning(f"Error parsing Xbox game: {e}")
                         continue
             
+            self.cache_games(response, games)
             logger.info(f"Found {len(games)} free deals on Xbox")
             return games
             
@@ -578,11 +1593,71 @@ class XboxScraper(GameScraper):
             logger.error(f"Error scraping Xbox: {e}")
             return []
 
+# google-play-scraper makes its own requests; they still go through the rate limiter
+GPLAY_URL = 'https://play.google.com/'
+
+@register_scraper('Google Play Games')
 class GooglePlayScraper(GameScraper):
     """Google Play Games - Using google-play-scraper library"""
     
+    # Details lookups run on a small pool; results are remembered between runs
+    workers = 8
+    metadata_ttl = 6 * 3600
+    cache_file = GPLAY_CACHE_FILE
+    
+    # Only these fields of the library's app() result are used and cached
+    DETAIL_FIELDS = ('title', 'free', 'price', 'summary', 'description', 'icon')
+    
     def __init__(self):
         super().__init__("Google Play Games", "Android")
+        self.metadata = None
+    
+    @classmethod
+    def configure(cls, config: Dict):
+        """Apply gplay_workers / gplay_cache_ttl / gplay_cache_file from config.json"""
+        cls.workers = config.get('gplay_workers', cls.workers)
+        cls.metadata_ttl = config.get('gplay_cache_ttl', cls.metadata_ttl)
+        cls.cache_file = config.get('gplay_cache_file', cls.cache_file)
+    
+    def app_details(self, app_id: str) -> Optional[Dict]:
+        """Get an app's details, from the metadata cache when checked recently"""
+        details = self.metadata.get(app_id)
+        if details is not None:
+            return details
+        
+        from google_play_scraper import app as gplay_app
+        
+        try:
+            self.rate_limiter.acquire(GPLAY_URL)
+            full_details = gplay_app(app_id, lang='en', country='au')
+        except Exception as e:
+            logger.debug(f"Error checking app {app_id}: {e}")
+            return None
+        
+        details = {field: full_details.get(field) for field in self.DETAIL_FIELDS}
+        self.metadata.put(app_id, details)
+        return details
+    
+    def details_in_batches(self, pool: ThreadPoolExecutor, app_ids: List[str]) -> Iterator:
+        """
+        Yield (app_id, details) in order, looking up one pool-sized batch at a
+        time so callers that stop early don't pay for the rest.
+        """
+        workers = max(1, self.workers)
+        for start in range(0, len(app_ids), workers):
+            batch = app_ids[start:start + workers]
+            yield from zip(batch, self.concurrently(pool, self.app_details, batch))
+    
+    @staticmethod
+    def search_apps(query: str) -> List[Dict]:
+        from google_play_scraper import search
+        
+        try:
+            GameScraper.rate_limiter.acquire(GPLAY_URL)
+            return search(query, lang='en', country='au', n_hits=15)
+        except Exception as e:
+            logger.warning(f"Error searching for '{query}': {e}")
+            return []
     
     def scrape(self) -> List[Dict]:
         """
@@ -597,6 +1672,8 @@ class GooglePlayScraper(GameScraper):
         
         games = []
         checked_apps = set()
+        self.metadata = MetadataCache(self.cache_file, self.metadata_ttl)
+        pool = ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix='gplay')
         
         try:
             logger.info("Checking Google Play for free games on sale...")
@@ -606,6 +1683,7 @@ class GooglePlayScraper(GameScraper):
                 from google_play_scraper import collection, Sort
                 
                 # Get games from the sales collection
+                self.rate_limiter.acquire(GPLAY_URL)
                 sale_results = collection(
                     collection_id='promotion_3002a18_gamesonsale',
                     lang='en',
@@ -615,42 +1693,40 @@ class GooglePlayScraper(GameScraper):
                 
                 logger.info(f"Found {len(sale_results)} games in sales collection")
                 
+                app_ids = []
                 for app_info in sale_results:
-                    try:
-                        app_id = app_info.get('appId')
-                        if app_id in checked_apps:
-                            continue
-                        checked_apps.add(app_id)
-                        
-                        # Get detailed info
-                        details = gplay_app(app_id, lang='en', country='au')
+                    app_id = app_info.get('appId')
+                    if app_id in checked_apps:
+                        continue
+                    checked_apps.add(app_id)
+                    app_ids.append(app_id)
+                
+                for app_id, details in self.details_in_batches(pool, app_ids):
+                    if details is None:
+                        continue
+                    
+                    # Check if it's free now
+                    is_free = details.get('free', False)
+                    price = details.get('price', 0)
+                    
+                    if is_free and price == 0:
+                        # It's in the sale collection AND it's free - good candidate!
+                        title = details.get('title', 'Unknown Game')
                         
-                        # Check if it's free now
-                        is_free = details.get('free', False)
-                        price = details.get('price', 0)
+                        games.append({
+                            'title': title,
+                            'store': self.store_name,
+                            'platform': self.platform,
+                            'description': (details.get('summary') or details.get('description') or '')[:200] + '...' if details.get('summary') or details.get('description') else 'Free game on Google Play sale',
+                            'image_url': details.get('icon', ''),
+                            'game_url': f"https://play.google.com/store/apps/details?id={app_id}",
+                            'original_price': 'On Sale',
+                            'end_date': 'Limited time',
+                            'store_logo': 'https://www.gstatic.com/android/market_images/web/favicon_v2.ico'
+                        })
                         
-                        if is_free and price == 0:
-                            # It's in the sale collection AND it's free - good candidate!
-                            title = details.get('title', 'Unknown Game')
-                            
-                            games.append({
-                                'title': title,
-                                'store': self.store_name,
-                                'platform': self.platform,
-                                'description': details.get('summary', details.get('description', ''))[:200] + '...' if details.get('summary') or details.get('description') else 'Free game on Google Play sale',
-                                'image_url': details.get('icon', ''),
-                                'game_url': f"https://play.google.com/store/apps/details?id={app_id}",
-                                'original_price': 'On Sale',
-                                'end_date': 'Limited time',
-                                'store_logo': 'https://www.gstatic.com/android/market_images/web/favicon_v2.ico'
-                            })
-                            
-                            if len(games) >= 10:
-                                break
-                                
-                    except Exception as e:
-                        logger.debug(f"Error checking sale game {app_info.get('appId', 'unknown')}: {e}")
-                        continue
+                        if len(games) >= 10:
+                            break
                         
             except Exception as e:
                 logger.warning(f"Could not access sales collection: {e}")
@@ -665,50 +1741,40 @@ class GooglePlayScraper(GameScraper):
                     'temporarily free'
                 ]
                 
-                for query in search_queries:
-                    try:
-                        results = search(query, lang='en', country='au', n_hits=15)
-                        
-                        for result in results:
-                            app_id = result.get('appId')
-                            if app_id in checked_apps:
-                                continue
-                            checked_apps.add(app_id)
-                            
-                            try:
-                                details = gplay_app(app_id, lang='en', country='au')
-                                
-                                if details.get('free') and details.get('price', 0) == 0:
-                                    title = details.get('title', 'Unknown Game')
-                                    description = details.get('summary', details.get('description', '')).lower()
-                                    
-                                    # Only include if description mentions being on sale/limited
-                                    if any(word in description for word in ['sale', 'free', 'limited', 'discount', 'was ']):
-                                        games.append({
-                                            'title': title,
-                                            'store': self.store_name,
-                                            'platform': self.platform,
-                                            'description': details.get('summary', details.get('description', ''))[:200] + '...' if details.get('summary') or details.get('description') else 'Free Android game',
-                                            'image_url': details.get('icon', ''),
-                                            'game_url': f"https://play.google.com/store/apps/details?id={app_id}",
-                                            'original_price': 'Was Paid',
-                                            'end_date': 'Limited time',
-                                            'store_logo': 'https://www.gstatic.com/android/market_images/web/favicon_v2.ico'
-                                        })
-                                        
-                                        if len(games) >= 10:
-                                            break
-                                            
-                            except Exception as e:
-                                logger.debug(f"Error checking app {app_id}: {e}")
-                                continue
+                # Run every search at once, then check the hits in query order
+                app_ids = []
+                for results in self.concurrently(pool, self.search_apps, search_queries):
+                    for result in results:
+                        app_id = result.get('appId')
+                        if app_id in checked_apps:
+                            continue
+                        checked_apps.add(app_id)
+                        app_ids.append(app_id)
+                
+                for app_id, details in self.details_in_batches(pool, app_ids):
+                    if details is None:
+                        continue
+                    
+                    if details.get('free') and details.get('price', 0) == 0:
+                        title = details.get('title', 'Unknown Game')
+                        description = (details.get('summary') or details.get('description') or '').lower()
                         
-                        if len(games) >= 10:
-                            break
+                        # Only include if description mentions being on sale/limited
+                        if any(word in description for word in ['sale', 'free', 'limited', 'discount', 'was ']):
+                            games.append({
+                                'title': title,
+                                'store': self.store_name,
+                                'platform': self.platform,
+                                'description': (details.get('summary') or details.get('description') or '')[:200] + '...' if details.get('summary') or details.get('description') else 'Free Android game',
+                                'image_url': details.get('icon', ''),
+                                'game_url': f"https://play.google.com/store/apps/details?id={app_id}",
+                                'original_price': 'Was Paid',
+                                'end_date': 'Limited time',
+                                'store_logo': 'https://www.gstatic.com/android/market_images/web/favicon_v2.ico'
+                            })
                             
-                    except Exception as e:
-                        logger.warning(f"Error searching for '{query}': {e}")
-                        continue
+                            if len(games) >= 10:
+                                break
             
             logger.info(f"Found {len(games)} free games on Google Play")
             return games
@@ -716,7 +1782,11 @@ class GooglePlayScraper(GameScraper):
         except Exception as e:
             logger.error(f"Error scraping Google Play Games: {e}")
             return []
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.metadata.save()
 
+@register_scraper('Prime Gaming')
 class PrimeGamingScraper(GameScraper):
     """Prime Gaming - Disabled"""
     
@@ -727,21 +1797,327 @@ class PrimeGamingScraper(GameScraper):
         logger.info("Prime Gaming scraper is disabled")
         return []
 
+@functools.lru_cache(maxsize=1024)
+def compile_store_pattern(pattern: str) -> re.Pattern:
+    """
+    Compile a custom store's search pattern once. Patterns are comma-separated
+    pieces of text ("FREE, $0.00, Gratis") matched case-insensitively.
+    """
+    terms = [term.strip() for term in pattern.split(',') if term.strip()]
+    if not terms:
+        return re.compile(r'(?!)')  # never matches
+    # Longest first so "100% off" wins over "100%"
+    terms.sort(key=len, reverse=True)
+    return re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+
+class CustomStoreScraper(GameScraper):
+    """User-defined store from the custom_stores table: a page and the text that marks a free game"""
+    
+    SKIP_TAGS = {'script', 'style', 'noscript', 'title', 'head', 'template'}
+    
+    def __init__(self, name: str, url: str, pattern: str):
+        super().__init__(name, "PC")
+        self.url = url
+        self.pattern = compile_store_pattern(pattern)
+    
+    @classmethod
+    def from_database(cls, db: 'Database') -> List['CustomStoreScraper']:
+        """One scraper per active custom store"""
+        return [cls(store['name'], store['url'], store['pattern']) for store in db.get_custom_stores()]
+    
+    def scrape(self) -> List[Dict]:
+        try:
+            response = self.get(self.url, conditional=True)
+            response.raise_for_status()
+            if response.cached_games is not None:
+                return response.cached_games
+            
+            games = self.find_games(response.text)
+            self.cache_games(response, games)
+            logger.info(f"Found {len(games)} free games on {self.store_name}")
+            return games
+            
+        except Exception as e:
+            logger.error(f"Error scraping {self.store_name}: {e}")
+            return []
+    
+    def find_games(self, text: str, limit: int = 10) -> List[Dict]:
+        """Find links next to text matching the store's pattern"""
+        # Most pages have nothing free most of the time, so skip parsing them
+        if not self.pattern.search(text):
+            return []
+        
+        games = []
+        seen = set()
+        soup = parse_html(text)
+        
+        for match in soup.find_all(string=self.pattern):
+            if match.parent is None or match.parent.name in self.SKIP_TAGS:
+                continue
+            
+            link = self.nearest_link(match)
+            if link is None:
+                continue
+            
+            game_url = urljoin(self.url, link['href'])
+            title = link.get_text(' ', strip=True) or link.get('title', '').strip()
+            if not title or game_url in seen:
+                continue
+            seen.add(game_url)
+            
+            img = link.find('img')
+            games.append({
+                'title': title[:200],
+                'store': self.store_name,
+                'platform': self.platform,
+                'description': f"Matched \"{self.pattern.search(match).group(0)}\" on {self.store_name}",
+                'image_url': urljoin(self.url, img.get('src', '')) if img and img.get('src') else '',
+                'game_url': game_url,
+                'original_price': 'Special Offer',
+                'end_date': '',
+                'store_logo': ''
+            })
+            if len(games) >= limit:
+                break
+        
+        return games
+    
+    @staticmethod
+    def nearest_link(match, depth: int = 4):
+        """The link around a piece of text, or the first link in its closest enclosing block"""
+        link = match.find_parent('a', href=True)
+        if link is not None:
+            return link
+        for ancestor in match.parents:
+            if depth == 0 or ancestor.name in ('body', 'html', '[document]'):
+                return None
+            link = ancestor.find('a', href=True)
+            if link is not None:
+                return link
+            depth -= 1
+        return None
+
+# end_date values stores use for offers without a fixed end
+OPEN_ENDED_DATES = {'', 'limited time', 'limited time sale', 'monthly rotation'}
+
+# Formats seen in end_date besides ISO 8601; times without a zone are UTC
+END_DATE_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d',
+                    '%d %B %Y', '%d %b %Y', '%B %d, %Y', '%b %d, %Y')
+
+# expiry_status values
+EXPIRY_PARSED = 'parsed'        # expires_at holds the end time
+EXPIRY_OPEN = 'open'            # no end date given
+EXPIRY_UNPARSED = 'unparsed'    # free text we couldn't read, treated as open
+
+@functools.lru_cache(maxsize=4096)
+def parse_end_date(end_date: Optional[str]) -> tuple:
+    """
+    Normalize a store's end_date to (expires_at, expiry_status). expires_at
+    is a UTC timestamp formatted like SQLite's CURRENT_TIMESTAMP so it
+    compares directly in SQL, or None when the offer has no readable end.
+    """
+    text = (end_date or '').strip()
+    if text.lower() in OPEN_ENDED_DATES:
+        return None, EXPIRY_OPEN
+    
+    cleaned = re.sub(r'\s*(UTC|GMT)$', '', text, flags=re.IGNORECASE)
+    end_dt = None
+    # The plain formats go first so a bare ISO date gets the end of day too;
+    # fromisoformat then handles 'T' separators, fractions and offsets
+    for fmt in END_DATE_FORMATS:
+        try:
+            end_dt = datetime.strptime(cleaned, fmt)
+        except ValueError:
+            continue
+        if '%H' not in fmt:
+            # A bare date means the offer runs until the end of that day
+            end_dt = end_dt.replace(hour=23, minute=59, second=59)
+        break
+    else:
+        try:
+            end_dt = datetime.fromisoformat(cleaned.replace('Z', '+00:00'))
+        except ValueError:
+            pass
+    
+    if end_dt is None:
+        return None, EXPIRY_UNPARSED
+    if end_dt.tzinfo is not None:
+        end_dt = end_dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return end_dt.strftime('%Y-%m-%d %H:%M:%S'), EXPIRY_PARSED
+
+def normalize_end_date(end_date: Optional[str]) -> Optional[str]:
+    """UTC expires_at for an end_date, or None if it has no readable end"""
+    return parse_end_date(end_date)[0]
+
+def end_date_status(end_date: Optional[str]) -> str:
+    """expiry_status for an end_date"""
+    return parse_end_date(end_date)[1]
+
+# The table a statement reads or writes, for labelling fgc_db_seconds
+SQL_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE|ON)\s+(\w+)', re.IGNORECASE)
+
+@functools.lru_cache(maxsize=512)
+def query_label(sql: str) -> str:
+    """Short label for a statement: its verb and first table, like 'SELECT jobs'"""
+    verb = sql.split(None, 1)[0].upper() if sql.strip() else ''
+    match = SQL_TABLE.search(sql)
+    return f"{verb} {match.group(1)}" if match else verb
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that times every statement, and fetching its rows, into fgc_db_seconds"""
+    
+    query = ''
+    
+    def execute(self, sql, parameters=()):
+        self.query = query_label(sql)
+        with METRICS.timer('fgc_db_seconds', query=self.query):
+            return super().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        self.query = query_label(sql)
+        with METRICS.timer('fgc_db_seconds', query=self.query):
+            return super().executemany(sql, seq_of_parameters)
+    
+    def executescript(self, sql_script):
+        self.query = 'SCRIPT'
+        with METRICS.timer('fgc_db_seconds', query=self.query):
+            return super().executescript(sql_script)
+    
+    def fetchone(self):
+        with METRICS.timer('fgc_db_seconds', query=self.query):
+            return super().fetchone()
+    
+    def fetchmany(self, *args, **kwargs):
+        with METRICS.timer('fgc_db_seconds', query=self.query):
+            return super().fetchmany(*args, **kwargs)
+    
+    def fetchall(self):
+        with METRICS.timer('fgc_db_seconds', query=self.query):
+            return super().fetchall()
+
+class TimedConnection(sqlite3.Connection):
+    """
+    Connection whose cursors are TimedCursors, so every query is measured
+    in one place: Database methods, the job queue and web.py's own SQL.
+    """
+    
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+    
+    # The C shortcuts would create plain cursors, so route them through ours
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+    
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+    
+    def commit(self):
+        with METRICS.timer('fgc_db_seconds', query='COMMIT'):
+            super().commit()
+    
+    # "with conn:" commits or rolls back without going through commit()
+    def __exit__(self, exc_type, exc_value, traceback):
+        with METRICS.timer('fgc_db_seconds', query='ROLLBACK' if exc_type else 'COMMIT'):
+            return super().__exit__(exc_type, exc_value, traceback)
+
 class Database:
     """SQLite database handler with platform support"""
     
+    # A thread keeps its connection until it calls release(), which hands it
+    # to a small per-process pool for the next thread. Long-lived threads
+    # (scheduler, job worker) just keep theirs; short-lived ones like web
+    # request threads release theirs when they finish. Schema setup runs
+    # once per process for each database file.
+    _local = threading.local()
+    _pool = {}              # (pid, db_path) -> idle connections
+    _pool_lock = threading.Lock()
+    POOL_SIZE = 8
+    _initialized = set()
+    _init_lock = threading.Lock()
+    
+    PRAGMAS = (
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        'PRAGMA cache_size=-16000',       # 16 MB page cache
+        'PRAGMA mmap_size=268435456',     # 256 MB memory-mapped I/O
+        'PRAGMA temp_store=MEMORY',
+        'PRAGMA busy_timeout=5000'
+    )
+    
     def __init__(self, db_path: str = DB_FILE):
         self.db_path = db_path
-        self.init_db()
-    
-    def init_db(self):
-        """Initialize database tables"""
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        key = (os.getpid(), self.db_path)
+        if key not in Database._initialized:
+            with Database._init_lock:
+                if key not in Database._initialized:
+                    self.init_db()
+                    Database._initialized.add(key)
+    
+    def connection(self) -> sqlite3.Connection:
+        """Get this thread's open connection to the database, opening it on first use"""
+        local = Database._local
+        if getattr(local, 'pid', None) != os.getpid():
+            # Fresh thread, or a forked child that must not reuse the parent's handles
+            local.pid = os.getpid()
+            local.connections = {}
         
-        cursor.execute('''
+        conn = local.connections.get(self.db_path)
+        if conn is None:
+            with Database._pool_lock:
+                idle = Database._pool.get((local.pid, self.db_path))
+                conn = idle.pop() if idle else None
+            if conn is None:
+                conn = self._open()
+            local.connections[self.db_path] = conn
+        return conn
+    
+    def _open(self) -> sqlite3.Connection:
+        # Pooled connections move between threads, but only one uses each at a time
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, factory=TimedConnection)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        conn.create_function('normalize_end_date', 1, normalize_end_date, deterministic=True)
+        conn.create_function('end_date_status', 1, end_date_status, deterministic=True)
+        return conn
+    
+    @classmethod
+    def release(cls):
+        """Return this thread's connections to the pool, e.g. at the end of a web request"""
+        local = cls._local
+        if getattr(local, 'pid', None) != os.getpid():
+            return
+        connections, local.connections = local.connections, {}
+        for db_path, conn in connections.items():
+            if conn.in_transaction:
+                conn.rollback()
+            with cls._pool_lock:
+                idle = cls._pool.setdefault((local.pid, db_path), [])
+                if len(idle) < cls.POOL_SIZE:
+                    idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+    
+    def close(self):
+        """Close this thread's connection (it is reopened on next use)"""
+        connections = getattr(Database._local, 'connections', {})
+        conn = connections.pop(self.db_path, None)
+        if conn is not None:
+            conn.close()
+    
+    # Migrations that create or reshape current_games; init_db rebuilds it after them
+    CURRENT_GAMES_MIGRATIONS = {5, 6}
+    
+    # Schema migrations as (version, statements), applied in order by init_db.
+    # The applied version is tracked in PRAGMA user_version. Never edit a
+    # released migration; append a new one instead.
+    MIGRATIONS = [
+        (1, [
+            '''
             CREATE TABLE IF NOT EXISTS games (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 title TEXT NOT NULL,
@@ -757,25 +2133,22 @@ class Database:
                 last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 UNIQUE(title, store)
             )
-        ''')
-        
-        cursor.execute('''
+            ''',
+            '''
             CREATE TABLE IF NOT EXISTS recipients (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 email TEXT UNIQUE NOT NULL,
                 active BOOLEAN DEFAULT 1,
                 added_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-        ''')
-        
-        cursor.execute('''
+            ''',
+            '''
             CREATE TABLE IF NOT EXISTS settings (
                 key TEXT PRIMARY KEY,
                 value TEXT
             )
-        ''')
-        
-        cursor.execute('''
+            ''',
+            '''
             CREATE TABLE IF NOT EXISTS custom_stores (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT UNIQUE NOT NULL,
@@ -784,52 +2157,265 @@ class Database:
                 active BOOLEAN DEFAULT 1,
                 added_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-        ''')
+            '''
+        ]),
+        (2, [
+            'CREATE INDEX IF NOT EXISTS idx_games_last_seen ON games (last_seen)',
+            'CREATE INDEX IF NOT EXISTS idx_games_store_last_seen ON games (store, last_seen)',
+            'CREATE INDEX IF NOT EXISTS idx_games_platform ON games (platform)'
+        ]),
+        (3, [
+            '''
+            CREATE TABLE IF NOT EXISTS digest_queue (
+                game_id INTEGER PRIMARY KEY,
+                queued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            '''
+        ]),
+        (4, [
+            '''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                progress TEXT,
+                result TEXT,
+                error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP
+            )
+            ''',
+            # At most one queued or running job of each kind
+            '''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active_kind ON jobs (kind)
+            WHERE status IN ('queued', 'running')
+            '''
+        ]),
+        (5, [
+            # Dashboard view of games that haven't expired, rebuilt by
+            # refresh_current_games whenever a check writes
+            '''
+            CREATE TABLE IF NOT EXISTS current_games (
+                game_id INTEGER PRIMARY KEY,
+                title TEXT NOT NULL,
+                store TEXT NOT NULL,
+                platform TEXT,
+                description TEXT,
+                image_url TEXT,
+                game_url TEXT,
+                original_price TEXT,
+                end_date TEXT,
+                store_logo TEXT,
+                expires_at TIMESTAMP,
+                last_seen TIMESTAMP
+            )
+            ''',
+            'CREATE INDEX IF NOT EXISTS idx_current_games_last_seen ON current_games (last_seen)'
+        ]),
+        (6, [
+            # Expiry parsed once at ingest instead of on every read
+            'ALTER TABLE games ADD COLUMN expires_at TIMESTAMP',
+            'ALTER TABLE games ADD COLUMN expiry_status TEXT',
+            'UPDATE games SET expires_at = normalize_end_date(end_date), expiry_status = end_date_status(end_date)',
+            'CREATE INDEX IF NOT EXISTS idx_games_expires_at ON games (expires_at)',
+            'ALTER TABLE current_games ADD COLUMN expiry_status TEXT'
+        ]),
+        (7, [
+            # One summary row per check, with per-store details as JSON
+            '''
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                duration_ms INTEGER,
+                stores INTEGER,
+                failed_stores INTEGER,
+                games INTEGER,
+                new_games INTEGER,
+                expired_games INTEGER,
+                http_requests INTEGER,
+                bytes_downloaded INTEGER,
+                details TEXT
+            )
+            '''
+        ]),
+        (8, [
+            # Circuit breaker state per store; history holds the latest
+            # outcomes, oldest first ('+' success, '-' failure)
+            '''
+            CREATE TABLE IF NOT EXISTS store_health (
+                store TEXT PRIMARY KEY,
+                state TEXT NOT NULL DEFAULT 'closed',
+                consecutive_failures INTEGER NOT NULL DEFAULT 0,
+                total_checks INTEGER NOT NULL DEFAULT 0,
+                total_failures INTEGER NOT NULL DEFAULT 0,
+                history TEXT NOT NULL DEFAULT '',
+                last_success TIMESTAMP,
+                last_failure TIMESTAMP,
+                last_error TEXT,
+                open_until TIMESTAMP
+            )
+            '''
+        ]),
+        (9, [
+            # Migration 6 read bare ISO dates ('2024-05-01') as midnight
+            # instead of the end of the day; re-normalize with the fixed parser
+            "UPDATE games SET expires_at = normalize_end_date(end_date) WHERE expiry_status = 'parsed'",
+            "UPDATE current_games SET expires_at = normalize_end_date(end_date) WHERE expiry_status = 'parsed'"
+        ]),
+        (10, [
+            # Process running each job, so jobs left by a dead worker can be failed
+            'ALTER TABLE jobs ADD COLUMN worker_pid INTEGER'
+        ])
+    ]
+    
+    # Queries on the check/dashboard hot path, with the index each one must use
+    RECENT_GAMES_SQL = '''
+        SELECT title, store, platform, description, image_url, game_url, original_price, end_date, store_logo,
+               expires_at, expiry_status
+        FROM games
+        WHERE last_seen >= ?
+        ORDER BY last_seen DESC
+    '''
+    CLEANUP_SQL = '''
+        DELETE FROM games
+        WHERE last_seen < ?
+    '''
+    CURRENT_GAMES_SQL = '''
+        SELECT title, store, platform, description, image_url, game_url, original_price, end_date, store_logo,
+               expires_at, expiry_status, last_seen
+        FROM current_games
+        WHERE last_seen >= datetime('now', ?) AND (expires_at IS NULL OR expires_at > CURRENT_TIMESTAMP)
+        ORDER BY last_seen DESC
+    '''
+    # Games still free as of their store's last successful check
+    ACTIVE_GAMES_SQL = '''
+        SELECT g.id, g.title, g.store, g.platform, g.description, g.image_url, g.game_url,
+               g.original_price, g.end_date, g.store_logo, g.expires_at, g.expiry_status
+        FROM games g
+        LEFT JOIN settings s ON s.key = 'last_check:' || g.store
+        WHERE (s.value IS NULL OR g.last_seen >= s.value)
+          AND (g.expires_at IS NULL OR g.expires_at > CURRENT_TIMESTAMP)
+    '''
+    REFRESH_CURRENT_GAMES_SQL = '''
+        INSERT INTO current_games (game_id, title, store, platform, description, image_url, game_url,
+                                   original_price, end_date, store_logo, expires_at, expiry_status, last_seen)
+        SELECT id, title, store, platform, description, image_url, game_url,
+               original_price, end_date, store_logo, expires_at, expiry_status, last_seen
+        FROM games
+        WHERE expires_at IS NULL OR expires_at > CURRENT_TIMESTAMP
+    '''
+    # Columns /api/games can return; query_games always includes id and last_seen
+    GAME_API_FIELDS = ('id', 'title', 'store', 'platform', 'description', 'image_url', 'game_url',
+                       'original_price', 'end_date', 'store_logo', 'expires_at', 'expiry_status',
+                       'first_seen', 'last_seen')
+    GAMES_PAGE_SQL = '''
+        SELECT {fields}
+        FROM games
+        WHERE {where}
+        ORDER BY last_seen DESC, id DESC
+        LIMIT ?
+    '''
+    def init_db(self):
+        """Initialize database tables and apply pending migrations"""
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         
-        conn.commit()
-        conn.close()
+        conn = self.connection()
+        current = self.schema_version()
+        applied = set()
+        
+        for version, statements in self.MIGRATIONS:
+            if version <= current:
+                continue
+            
+            with conn:
+                # Another process may have migrated while we waited for the lock
+                conn.execute('BEGIN IMMEDIATE')
+                if self.schema_version() >= version:
+                    continue
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f'PRAGMA user_version = {int(version)}')
+            
+            applied.add(version)
+            logger.info(f"Migrated database {self.db_path} to schema version {version}")
+        
+        # Fill the dashboard view right away rather than at the next check
+        if applied & self.CURRENT_GAMES_MIGRATIONS:
+            self.refresh_current_games()
+    
+    def schema_version(self) -> int:
+        """Get the applied schema version"""
+        return self.connection().execute('PRAGMA user_version').fetchone()[0]
     
     def add_game(self, game: Dict):
         """Add or update a game in database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        self.add_games([game])
+    
+    def add_games(self, games: List[Dict]) -> Dict[str, int]:
+        """
+        Add or update many games in one transaction.
+        
+        Returns how many rows were inserted and how many existing rows were
+        updated.
+        """
+        rows = [(
+            game['title'], game['store'], game.get('platform', 'PC'), game['description'],
+            game['image_url'], game['game_url'], game['original_price'],
+            game['end_date'], game.get('store_logo', ''), *parse_end_date(game['end_date'])
+        ) for game in games]
+        
+        counts = {'inserted': 0, 'updated': 0}
+        if not rows:
+            return counts
         
+        conn = self.connection()
         try:
-            cursor.execute('''
-                INSERT INTO games (title, store, platform, description, image_url, game_url, original_price, end_date, store_logo)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(title, store) DO UPDATE SET
-                    last_seen = CURRENT_TIMESTAMP,
-                    platform = excluded.platform,
-                    description = excluded.description,
-                    image_url = excluded.image_url,
-                    game_url = excluded.game_url,
-                    original_price = excluded.original_price,
-                    end_date = excluded.end_date
-            ''', (
-                game['title'], game['store'], game.get('platform', 'PC'), game['description'],
-                game['image_url'], game['game_url'], game['original_price'],
-                game['end_date'], game.get('store_logo', '')
-            ))
-            conn.commit()
+            with conn:
+                # Take the write lock up front so the existence check below
+                # can't race another writer
+                conn.execute('BEGIN IMMEDIATE')
+                
+                keys = {(row[0], row[1]) for row in rows}
+                stores = sorted({row[1] for row in rows})
+                cursor = conn.execute(
+                    f"SELECT title, store FROM games WHERE store IN ({','.join('?' * len(stores))})",
+                    stores
+                )
+                existing = keys.intersection(cursor.fetchall())
+                
+                conn.executemany('''
+                    INSERT INTO games (title, store, platform, description, image_url, game_url, original_price, end_date, store_logo,
+                                       expires_at, expiry_status)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(title, store) DO UPDATE SET
+                        last_seen = CURRENT_TIMESTAMP,
+                        platform = excluded.platform,
+                        description = excluded.description,
+                        image_url = excluded.image_url,
+                        game_url = excluded.game_url,
+                        original_price = excluded.original_price,
+                        end_date = excluded.end_date,
+                        expires_at = excluded.expires_at,
+                        expiry_status = excluded.expiry_status
+                ''', rows)
+                self._bump_data_version(conn)
+            
+            counts['inserted'] = len(keys) - len(existing)
+            counts['updated'] = len(rows) - counts['inserted']
         except Exception as e:
-            logger.error(f"Error adding game to database: {e}")
-        finally:
-            conn.close()
+            logger.error(f"Error adding games to database: {e}")
+        
+        return counts
     
     def get_recent_games(self, hours: int = 168) -> List[Dict]:
         """Get games seen in the last X hours"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.connection().cursor()
         
         cutoff_time = datetime.now() - timedelta(hours=hours)
         
-        cursor.execute('''
-            SELECT title, store, platform, description, image_url, game_url, original_price, end_date, store_logo
-            FROM games
-            WHERE last_seen >= ?
-            ORDER BY last_seen DESC
-        ''', (cutoff_time,))
+        cursor.execute(self.RECENT_GAMES_SQL, (cutoff_time,))
         
         games = []
         for row in cursor.fetchall():
@@ -842,275 +2428,538 @@ class Database:
                 'game_url': row[5],
                 'original_price': row[6],
                 'end_date': row[7],
-                'store_logo': row[8]
+                'store_logo': row[8],
+                'expires_at': row[9],
+                'expiry_status': row[10]
             })
         
-        conn.close()
         return games
     
+    def refresh_current_games(self):
+        """
+        Rebuild the current_games view from the games table with normalized
+        expiry times, and bump the data version so cached pages reload.
+        """
+        with self.connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('DELETE FROM current_games')
+            conn.execute(self.REFRESH_CURRENT_GAMES_SQL)
+            self._bump_data_version(conn)
+    
+    def get_current_games(self, hours: int = 168) -> List[Dict]:
+        """Get unexpired games seen in the last X hours from the current_games view"""
+        # last_seen is UTC, so compare against SQLite's UTC clock
+        cursor = self.connection().execute(self.CURRENT_GAMES_SQL, (f'-{int(hours)} hours',))
+        
+        fields = ('title', 'store', 'platform', 'description', 'image_url', 'game_url',
+                  'original_price', 'end_date', 'store_logo', 'expires_at', 'expiry_status', 'last_seen')
+        return [dict(zip(fields, row)) for row in cursor.fetchall()]
+    
+    def query_games(self, stores: Optional[List[str]] = None, platforms: Optional[List[str]] = None,
+                    expires_after: Optional[str] = None, expires_before: Optional[str] = None,
+                    first_seen_after: Optional[str] = None, first_seen_before: Optional[str] = None,
+                    after: Optional[tuple] = None, limit: int = 100,
+                    fields: Optional[List[str]] = None) -> List[Dict]:
+        """
+        One page of games, newest last_seen first, for keyset pagination.
+        
+        after is the (last_seen, id) of the previous page's last game; the
+        page holds the games that sort after it. Timestamps are UTC in
+        CURRENT_TIMESTAMP format. Only the requested fields are read.
+        """
+        fields = [field for field in (fields or self.GAME_API_FIELDS) if field in self.GAME_API_FIELDS]
+        columns = list(dict.fromkeys(['id', 'last_seen'] + fields))
+        
+        where, params = [], []
+        if stores:
+            where.append(f"store IN ({','.join('?' * len(stores))})")
+            params += stores
+        if platforms:
+            where.append(f"platform IN ({','.join('?' * len(platforms))})")
+            params += platforms
+        for column, op, value in (('expires_at', '>=', expires_after), ('expires_at', '<', expires_before),
+                                  ('first_seen', '>=', first_seen_after), ('first_seen', '<', first_seen_before)):
+            if value is not None:
+                where.append(f'{column} {op} ?')
+                params.append(value)
+        if after is not None:
+            where.append('(last_seen, id) < (?, ?)')
+            params += list(after)
+        
+        sql = self.GAMES_PAGE_SQL.format(fields=', '.join(columns), where=' AND '.join(where) or '1')
+        cursor = self.connection().execute(sql, params + [limit])
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    def record_run(self, run: RunStats, diff: Dict[str, List[Dict]]):
+        """Save a summary of a finished check to the runs table"""
+        details = {
+            store: {key: value for key, value in totals.items() if key != 'started'}
+            for store, totals in run.stores.items()
+        }
+        with self.connection() as conn:
+            conn.execute('''
+                INSERT INTO runs (started_at, duration_ms, stores, failed_stores, games, new_games, expired_games,
+                                  http_requests, bytes_downloaded, details)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                run.started_at,
+                round(run.duration() * 1000),
+                len(details),
+                sum(1 for totals in details.values() if totals.get('status') != 'done'),
+                sum(totals.get('games', 0) for totals in details.values()),
+                len(diff['new']),
+                len(diff['expired']),
+                sum(totals.get('requests', 0) for totals in details.values()),
+                sum(totals.get('bytes', 0) for totals in details.values()),
+                json.dumps(details)
+            ))
+    
+    def get_runs(self, limit: int = 50) -> List[Dict]:
+        """Most recent check summaries, newest first"""
+        cursor = self.connection().execute(
+            'SELECT id, started_at, finished_at, duration_ms, stores, failed_stores, games, new_games, '
+            'expired_games, http_requests, bytes_downloaded, details FROM runs ORDER BY id DESC LIMIT ?',
+            (limit,)
+        )
+        fields = ('id', 'started_at', 'finished_at', 'duration_ms', 'stores', 'failed_stores', 'games',
+                  'new_games', 'expired_games', 'http_requests', 'bytes_downloaded', 'details')
+        runs = [dict(zip(fields, row)) for row in cursor.fetchall()]
+        for run in runs:
+            run['details'] = json.loads(run['details']) if run['details'] else {}
+        return runs
+    
+    STORE_HEALTH_FIELDS = ('store', 'state', 'consecutive_failures', 'total_checks', 'total_failures',
+                           'history', 'last_success', 'last_failure', 'last_error', 'open_until')
+    
+    def get_store_health(self) -> Dict[str, Dict]:
+        """Health record of every store checked so far, keyed by store"""
+        cursor = self.connection().execute(
+            f"SELECT {', '.join(self.STORE_HEALTH_FIELDS)} FROM store_health ORDER BY store"
+        )
+        return {row[0]: dict(zip(self.STORE_HEALTH_FIELDS, row)) for row in cursor.fetchall()}
+    
+    def save_store_health(self, records: List[Dict]):
+        """Write updated health records in one transaction"""
+        placeholders = ', '.join('?' * len(self.STORE_HEALTH_FIELDS))
+        with self.connection() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO store_health ({', '.join(self.STORE_HEALTH_FIELDS)}) VALUES ({placeholders})",
+                [tuple(record[field] for field in self.STORE_HEALTH_FIELDS) for record in records]
+            )
+    
+    def data_version(self) -> int:
+        """Counter bumped whenever games, or anything else shown on the dashboard, change"""
+        row = self.connection().execute("SELECT value FROM settings WHERE key = 'data_version'").fetchone()
+        return int(row[0]) if row else 0
+    
+    def bump_data_version(self):
+        """Invalidate cached dashboard pages after changing what they show"""
+        with self.connection() as conn:
+            self._bump_data_version(conn)
+    
+    @staticmethod
+    def _bump_data_version(conn: sqlite3.Connection):
+        conn.execute('''
+            INSERT INTO settings (key, value) VALUES ('data_version', 1)
+            ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+        ''')
+    
+    def diff_games(self, games: List[Dict], stores: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Classify a scrape result against the games table.
+        
+        - new: not in the table, or not seen in that store's previous check
+          (the promotion had ended and is back)
+        - active: already seen in the store's previous check
+        - expired: seen in the store's previous check but missing now
+        
+        Uses one query per call and set operations; run it before add_games.
+        """
+        diff = {'new': [], 'active': [], 'expired': []}
+        stores = sorted(set(stores))
+        if not stores:
+            return diff
+        
+        last_checks = self.get_store_checks(stores)
+        cursor = self.connection().execute(
+            f"SELECT title, store, last_seen FROM games WHERE store IN ({','.join('?' * len(stores))})",
+            stores
+        )
+        
+        previously_active = set()
+        for title, store, last_seen in cursor.fetchall():
+            last_check = last_checks.get(store)
+            if last_check is None or (last_seen and last_seen >= last_check):
+                previously_active.add((title, store))
+        
+        current = set()
+        for game in games:
+            key = (game['title'], game['store'])
+            if key in current:
+                continue
+            current.add(key)
+            diff['active' if key in previously_active else 'new'].append(game)
+        
+        diff['expired'] = [
+            {'title': title, 'store': store}
+            for title, store in sorted(previously_active - current)
+        ]
+        return diff
+    
+    def get_store_checks(self, stores: List[str]) -> Dict[str, str]:
+        """Get the time each store was last checked successfully"""
+        keys = [f'last_check:{store}' for store in stores]
+        cursor = self.connection().execute(
+            f"SELECT key, value FROM settings WHERE key IN ({','.join('?' * len(keys))})",
+            keys
+        )
+        return {key[len('last_check:'):]: value for key, value in cursor.fetchall()}
+    
+    def mark_stores_checked(self, stores: List[str], checked_at: str):
+        """Record when stores were last checked successfully (a CURRENT_TIMESTAMP value)"""
+        with self.connection() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)',
+                [(f'last_check:{store}', checked_at) for store in stores]
+            )
+    
+    def current_timestamp(self) -> str:
+        """Get CURRENT_TIMESTAMP as SQLite formats it for last_seen"""
+        return self.connection().execute('SELECT CURRENT_TIMESTAMP').fetchone()[0]
+    
+    def get_settings(self, keys: List[str]) -> Dict[str, str]:
+        """Get several values from the settings table"""
+        if not keys:
+            return {}
+        cursor = self.connection().execute(
+            f"SELECT key, value FROM settings WHERE key IN ({','.join('?' * len(keys))})",
+            keys
+        )
+        return dict(cursor.fetchall())
+    
+    def set_settings(self, values: Dict[str, str]):
+        """Write several values to the settings table in one transaction"""
+        with self.connection() as conn:
+            conn.executemany('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)', values.items())
+    
+    def queue_digest(self, games: List[Dict]):
+        """Queue newly-free games for the next email digest"""
+        with self.connection() as conn:
+            conn.executemany(
+                'INSERT OR IGNORE INTO digest_queue (game_id) SELECT id FROM games WHERE title = ? AND store = ?',
+                [(game['title'], game['store']) for game in games]
+            )
+    
+    def get_digest_games(self, new_only: bool = True) -> List[Dict]:
+        """
+        Games for the next digest: queued games that are still free, or every
+        game that is still free when new_only is False.
+        """
+        sql = self.ACTIVE_GAMES_SQL
+        if new_only:
+            sql += ' AND g.id IN (SELECT game_id FROM digest_queue)'
+        cursor = self.connection().execute(sql)
+        
+        fields = ('id', 'title', 'store', 'platform', 'description', 'image_url', 'game_url',
+                  'original_price', 'end_date', 'store_logo', 'expires_at', 'expiry_status')
+        return [dict(zip(fields, row)) for row in cursor.fetchall()]
+    
+    def clear_digest(self, game_ids: List[int]):
+        """Remove games from the digest queue once they have been emailed"""
+        with self.connection() as conn:
+            conn.executemany('DELETE FROM digest_queue WHERE game_id = ?', [(game_id,) for game_id in game_ids])
+    
+    def create_job(self, kind: str) -> Dict:
+        """
+        Queue a background job unless one of the same kind is already queued
+        or running. Returns {'id': job id, 'created': whether it was queued now}.
+        """
+        conn = self.connection()
+        while True:
+            try:
+                with conn:
+                    cursor = conn.execute('INSERT INTO jobs (kind) VALUES (?)', (kind,))
+                return {'id': cursor.lastrowid, 'created': True}
+            except sqlite3.IntegrityError:
+                with conn:
+                    conn.execute('BEGIN IMMEDIATE')
+                    self._fail_orphaned_jobs(conn)
+                    row = conn.execute(
+                        "SELECT id FROM jobs WHERE kind = ? AND status IN ('queued', 'running')", (kind,)
+                    ).fetchone()
+                # Otherwise the other job finished or its worker died, so try again
+                if row is not None:
+                    return {'id': row[0], 'created': False}
+    
+    @staticmethod
+    def _fail_orphaned_jobs(conn: sqlite3.Connection):
+        """Fail running jobs whose worker process is gone (crashed or restarted)"""
+        rows = conn.execute("SELECT id, worker_pid FROM jobs WHERE status = 'running'").fetchall()
+        orphaned = [(job_id,) for job_id, pid in rows if not process_alive(pid)]
+        if orphaned:
+            logger.warning(f"Failing {len(orphaned)} job(s) left running by a worker that exited")
+            conn.executemany(
+                "UPDATE jobs SET status = 'failed', error = 'Interrupted', finished_at = CURRENT_TIMESTAMP "
+                "WHERE id = ?",
+                orphaned
+            )
+    
+    def claim_job(self, kinds: List[str], stale_after: int = 3600) -> Optional[Dict]:
+        """
+        Mark the oldest queued job of the given kinds as running in this
+        process and return it. Jobs whose worker process has exited, or that
+        have been running for stale_after seconds (their worker hung), are
+        failed first so they stop blocking new ones.
+        """
+        conn = self.connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            self._fail_orphaned_jobs(conn)
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Interrupted', finished_at = CURRENT_TIMESTAMP "
+                "WHERE status = 'running' AND started_at < datetime('now', ?)",
+                (f'-{int(stale_after)} seconds',)
+            )
+            row = conn.execute(
+                f"SELECT id, kind FROM jobs WHERE status = 'queued' AND kind IN ({','.join('?' * len(kinds))}) "
+                "ORDER BY id LIMIT 1",
+                kinds
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = CURRENT_TIMESTAMP, worker_pid = ? WHERE id = ?",
+                (os.getpid(), row[0])
+            )
+        return {'id': row[0], 'kind': row[1]}
+    
+    def update_job_progress(self, job_id: int, progress: Dict):
+        """Save a running job's per-store progress"""
+        with self.connection() as conn:
+            conn.execute('UPDATE jobs SET progress = ? WHERE id = ?', (json.dumps(progress), job_id))
+    
+    def finish_job(self, job_id: int, result: Optional[Dict] = None, error: Optional[str] = None):
+        """Record a job's outcome; a job with an error is marked failed"""
+        with self.connection() as conn:
+            conn.execute(
+                'UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = CURRENT_TIMESTAMP WHERE id = ?',
+                ('failed' if error else 'done', json.dumps(result) if result is not None else None, error, job_id)
+            )
+    
+    def get_job(self, job_id: int) -> Optional[Dict]:
+        """Get a job with its progress and result decoded"""
+        row = self.connection().execute(
+            'SELECT id, kind, status, progress, result, error, created_at, started_at, finished_at '
+            'FROM jobs WHERE id = ?',
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        
+        job = dict(zip(('id', 'kind', 'status', 'progress', 'result', 'error',
+                        'created_at', 'started_at', 'finished_at'), row))
+        job['progress'] = json.loads(job['progress']) if job['progress'] else {}
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+    
+    def get_custom_stores(self) -> List[Dict]:
+        """Get all active custom stores"""
+        cursor = self.connection().execute(
+            'SELECT name, url, pattern FROM custom_stores WHERE active = 1 ORDER BY id'
+        )
+        return [{'name': row[0], 'url': row[1], 'pattern': row[2]} for row in cursor.fetchall()]
+    
     def get_recipients(self) -> List[str]:
         """Get all active email recipients"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.connection().cursor()
         
         cursor.execute('SELECT email FROM recipients WHERE active = 1')
-        emails = [row[0] for row in cursor.fetchall()]
-        
-        conn.close()
-        return emails
+        return [row[0] for row in cursor.fetchall()]
     
     def cleanup_old_games(self, days: int = 7):
         """Remove games older than specified days"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = self.connection()
         
         cutoff_time = datetime.now() - timedelta(days=days)
         
-        cursor.execute('''
-            DELETE FROM games
-            WHERE last_seen < ?
-        ''', (cutoff_time,))
+        with conn:
+            cursor = conn.execute(self.CLEANUP_SQL, (cutoff_time,))
+            conn.execute('DELETE FROM digest_queue WHERE game_id NOT IN (SELECT id FROM games)')
         
         deleted_count = cursor.rowcount
-        conn.commit()
-        conn.close()
-        
+        if deleted_count:
+            self.refresh_current_games()
         logger.info(f"Cleaned up {deleted_count} old games from database")
         return deleted_count
 
+# Game fields that appear in a rendered email card
+GAME_CARD_FIELDS = ('title', 'store', 'platform', 'description', 'image_url', 'game_url', 'original_price', 'end_date',
+                    'expires_at')
+
+_email_templates = None
+_email_templates_lock = threading.Lock()
+
+def email_template(name: str) -> jinja2.Template:
+    """Get a compiled email template; the environment is built once per process"""
+    global _email_templates
+    if _email_templates is None:
+        with _email_templates_lock:
+            if _email_templates is None:
+                _email_templates = jinja2.Environment(
+                    loader=jinja2.FileSystemLoader(TEMPLATE_DIR),
+                    autoescape=True,
+                    trim_blocks=True,
+                    lstrip_blocks=True,
+                    auto_reload=False,
+                    keep_trailing_newline=True
+                )
+    return _email_templates.get_template(name)
+
+def format_end_date(end_date: Optional[str], expires_at: Optional[str] = None) -> str:
+    """
+    Human-readable expiry line for an email card. Uses the expires_at
+    stored at ingest when the game has one, so end_date isn't parsed again.
+    """
+    if not end_date:
+        return ""
+    if expires_at is None:
+        expires_at = normalize_end_date(end_date)
+    if expires_at:
+        end_dt = datetime.strptime(expires_at, '%Y-%m-%d %H:%M:%S')
+        return f"⏰ Available until: {end_dt.strftime('%B %d, %Y')}"
+    return f"⏰ {end_date}"
+
 class EmailSender:
     """Email sender with fancy HTML templates and platform icons"""
     
     def __init__(self, config: Dict):
         self.config = config
-        self.smtp_server = "smtp.gmail.com"
-        self.smtp_port = 587
+        self.smtp_server = config.get('smtp_server', "smtp.gmail.com")
+        self.smtp_port = config.get('smtp_port', 587)
+        self.smtp_starttls = config.get('smtp_starttls', True)
+        self.send_rate = config.get('email_rate_limit', 5)      # messages per second, 0 = unlimited
+        self.send_attempts = config.get('email_send_attempts', 3)
         self.platform_icons = {
             'PC': '🖥️',
             'Xbox': '🎮',
             'Nintendo Switch': '🕹️',
             'Android': '📱'
         }
+        self._card_cache = {}
     
+    @METRICS.timed('fgc_email_render_seconds')
     def create_html_email(self, games: List[Dict]) -> str:
         """Create fancy HTML email with game cards and platform icons"""
-        
-        html = """
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <style>
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background-color: #f4f4f4;
-            margin: 0;
-            padding: 20px;
-        }
-        .container {
-            max-width: 600px;
-            margin: 0 auto;
-            background-color: #ffffff;
-            border-radius: 10px;
-            overflow: hidden;
-            box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        }
-        .header {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 30px;
-            text-align: center;
-        }
-        .header h1 {
-            margin: 0;
-            font-size: 28px;
-        }
-        .header p {
-            margin: 10px 0 0 0;
-            opacity: 0.9;
-        }
-        .game-card {
-            border-bottom: 1px solid #e0e0e0;
-            padding: 20px;
-            transition: background-color 0.3s;
-        }
-        .game-card:hover {
-            background-color: #f9f9f9;
-        }
-        .game-card:last-child {
-            border-bottom: none;
-        }
-        .game-image {
-            width: 100%;
-            height: auto;
-            border-radius: 8px;
-            margin-bottom: 15px;
-        }
-        .store-badge {
-            display: inline-block;
-            background-color: #667eea;
-            color: white;
-            padding: 5px 15px;
-            border-radius: 20px;
-            font-size: 14px;
-            font-weight: bold;
-            margin-bottom: 10px;
-        }
-        .platform-info {
-            color: #666;
-            font-size: 13px;
-            margin-bottom: 10px;
-        }
-        .game-title {
-            font-size: 22px;
-            font-weight: bold;
-            color: #333;
-            margin: 10px 0;
-        }
-        .price-info {
-            color: #e74c3c;
-            font-weight: bold;
-            font-size: 18px;
-            margin: 10px 0;
-        }
-        .price-original {
-            text-decoration: line-through;
-            color: #999;
-            margin-right: 10px;
-        }
-        .price-free {
-            color: #27ae60;
-        }
-        .game-description {
-            color: #666;
-            line-height: 1.6;
-            margin: 10px 0;
-        }
-        .expiry {
-            color: #e67e22;
-            font-size: 14px;
-            margin: 10px 0;
-        }
-        .claim-button {
-            display: inline-block;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 12px 30px;
-            text-decoration: none;
-            border-radius: 25px;
-            font-weight: bold;
-            margin-top: 15px;
-            transition: transform 0.2s;
-        }
-        .claim-button:hover {
-            transform: translateY(-2px);
-        }
-        .footer {
-            background-color: #f4f4f4;
-            padding: 20px;
-            text-align: center;
-            color: #666;
-            font-size: 12px;
-        }
-        .divider {
-            height: 2px;
-            background: linear-gradient(to right, transparent, #667eea, transparent);
-            margin: 20px 0;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🎮 Free Games Available!</h1>
-            <p>Your weekly roundup of free games</p>
-        </div>
-"""
-        
-        # Add game cards
-        for i, game in enumerate(games):
-            platform_icon = self.platform_icons.get(game.get('platform', 'PC'), '🖥️')
+        cards = [self.render_game_card(game) for game in games]
+        return email_template('email/digest.html').render(cards=cards)
+    
+    def render_game_card(self, game: Dict) -> markupsafe.Markup:
+        """Render one game card, reusing the fragment if this sender already rendered it"""
+        key = tuple(game.get(field) or '' for field in GAME_CARD_FIELDS)
+        card = self._card_cache.get(key)
+        if card is None:
             platform_name = game.get('platform', 'PC')
-            
-            end_date_text = ""
-            if game.get('end_date'):
-                try:
-                    end_dt = datetime.fromisoformat(game['end_date'].replace('Z', '+00:00'))
-                    end_date_text = f"⏰ Available until: {end_dt.strftime('%B %d, %Y')}"
-                except:
-                    if game['end_date']:
-                        end_date_text = f"⏰ {game['end_date']}"
-            
-            html += f"""
-        <div class="game-card">
-            <span class="store-badge">{platform_icon} {game['store']}</span>
-            <div class="platform-info">Platform: {platform_name}</div>
-            """
-            
-            if game.get('image_url'):
-                html += f"""
-            <img src="{game['image_url']}" alt="{game['title']}" class="game-image">
-            """
-            
-            html += f"""
-            <div class="game-title">{game['title']}</div>
-            <div class="price-info">
-                <span class="price-original">{game.get('original_price', 'N/A')}</span>
-                <span class="price-free">FREE</span>
-            </div>
-            <div class="game-description">{game['description']}</div>
-            """
-            
-            if end_date_text:
-                html += f"""
-            <div class="expiry">{end_date_text}</div>
-            """
-            
-            html += f"""
-            <a href="{game['game_url']}" class="claim-button">🔗 Claim Now</a>
-        </div>
-        """
-            
-            if i < len(games) - 1:
-                html += '<div class="divider"></div>'
-        
-        html += """
-        <div class="footer">
-            <p>You're receiving this email because you subscribed to Free Game Checker</p>
-            <p>Happy gaming! 🎮</p>
-        </div>
-    </div>
-</body>
-</html>
-"""
-        return html
+            card = markupsafe.Markup(email_template('email/_game_card.html').render(
+                game=game,
+                platform_icon=self.platform_icons.get(platform_name, '🖥️'),
+                platform_name=platform_name,
+                end_date_text=format_end_date(game.get('end_date'), game.get('expires_at'))
+            ))
+            self._card_cache[key] = card
+        return card
+    
+    def connect(self) -> smtplib.SMTP:
+        """Open an authenticated SMTP connection"""
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=30)
+        try:
+            if self.smtp_starttls:
+                server.starttls()
+            if self.config.get('email_password'):
+                server.login(self.config['email_sender'], self.config['email_password'])
+        except Exception:
+            server.close()
+            raise
+        return server
     
-    def send_email(self, recipients: List[str], games: List[Dict]):
-        """Send fancy HTML email to recipients"""
+    @staticmethod
+    def disconnect(server: Optional[smtplib.SMTP]):
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+    
+    def send_email(self, recipients: List[str], games: List[Dict]) -> Dict[str, Optional[str]]:
+        """
+        Send the HTML email to each recipient individually.
         
+        All messages go over one SMTP connection, which is re-opened if the
+        server drops it, at no more than email_rate_limit messages per
+        second. Returns {recipient: None on success, or the error message}.
+        """
+        
+        results = {}
         if not games:
             logger.info("No games to send")
-            return
+            return results
         
-        try:
-            msg = MIMEMultipart('alternative')
-            msg['From'] = self.config['email_sender']
-            msg['To'] = ', '.join(recipients)
-            msg['Subject'] = f"🎮 {len(games)} Free Games Available This Week!"
-            
-            html_content = self.create_html_email(games)
-            msg.attach(MIMEText(html_content, 'html'))
-            
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.config['email_sender'], self.config['email_password'])
-                server.send_message(msg)
-            
-            logger.info(f"Email sent successfully to {len(recipients)} recipients")
-            
-        except Exception as e:
-            logger.error(f"Error sending email: {e}")
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+        
+        # Render and encode the body once; only the To header changes per recipient
+        msg = MIMEMultipart('alternative')
+        msg['From'] = self.config['email_sender']
+        msg['To'] = ''
+        msg['Subject'] = f"🎮 {len(games)} Free Games Available This Week!"
+        msg.attach(MIMEText(self.create_html_email(games), 'html'))
+        
+        interval = 1.0 / self.send_rate if self.send_rate else 0
+        next_send = 0.0
+        server = None
+        with METRICS.timer('fgc_email_send_seconds', attrs={'recipients': len(recipients)}):
+            try:
+                for recipient in recipients:
+                    delay = next_send - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    next_send = time.monotonic() + interval
+                    
+                    msg.replace_header('To', recipient)
+                    for attempt in range(1, self.send_attempts + 1):
+                        try:
+                            if server is None:
+                                server = self.connect()
+                            server.send_message(msg, to_addrs=[recipient])
+                            results[recipient] = None
+                            break
+                        except smtplib.SMTPAuthenticationError:
+                            # Retrying won't help, fail the whole batch
+                            raise
+                        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                            # The server rejected this message, the connection is still fine
+                            results[recipient] = str(e)
+                            break
+                        except (smtplib.SMTPException, OSError) as e:
+                            results[recipient] = str(e)
+                            logger.warning(f"SMTP error sending to {recipient} (attempt {attempt}/{self.send_attempts}): {e}")
+                            self.disconnect(server)
+                            server = None
+            except Exception as e:
+                logger.error(f"Error sending email: {e}")
+                for recipient in recipients:
+                    if results.get(recipient, '') is not None:
+                        results[recipient] = str(e)
+            finally:
+                self.disconnect(server)
+        
+        failed = [recipient for recipient, error in results.items() if error is not None]
+        METRICS.inc('fgc_emails_sent_total', len(results) - len(failed))
+        METRICS.inc('fgc_email_errors_total', len(failed))
+        for recipient in failed:
+            logger.error(f"Failed to send email to {recipient}: {results[recipient]}")
+        logger.info(f"Email sent successfully to {len(results) - len(failed)}/{len(recipients)} recipients")
+        return results
 
 def load_config() -> Dict:
     """Load configuration from file"""
@@ -1139,42 +2988,413 @@ def load_config() -> Dict:
             json.dump(default_config, f, indent=4)
         return default_config
 
-def check_and_send_games():
-    """Main function to check stores and send emails"""
-    logger.info("Starting game check...")
+def run_scrapers(scrapers: List[GameScraper], max_workers: int = DEFAULT_SCRAPE_WORKERS,
+                 store_timeout: float = DEFAULT_STORE_TIMEOUT,
+                 total_timeout: float = DEFAULT_SCRAPE_TIMEOUT,
+                 progress: Optional[Callable] = None) -> Dict[str, List[Dict]]:
+    """
+    Run scrapers concurrently and collect results as each store finishes.
     
-    config = load_config()
-    db = Database()
+    Each store gets store_timeout seconds from the moment its worker starts,
+    and the whole run is capped at total_timeout seconds. Stores that miss
+    their deadline are abandoned (their worker thread finishes in the
+    background) and are left out of the results.
     
-    # Cleanup old games (older than 7 days)
-    db.cleanup_old_games(days=7)
+    progress, if given, is called as progress(store_name, status, games)
+    when a store starts ('running', games None) and when it ends ('done',
+    'failed' or 'timeout').
+    """
+    results = {}
+    if not scrapers:
+        return results
     
-    # Initialize scrapers
-    scrapers = {
-        'Epic Games Store': EpicGamesScraper(),
-        'Steam': SteamScraper(),
-        'GOG': GOGScraper(),
-        'Humble Bundle': HumbleBundleScraper(),
-        'Itch.io': ItchIOScraper(),
-        'Prime Gaming': PrimeGamingScraper(),
-        'Google Play Games': GooglePlayScraper(),
-        'Nintendo Switch': NintendoSwitchScraper(),
-        'Xbox Store': XboxScraper()
-    }
+    started = {}
+    if progress is None:
+        progress = lambda store_name, status, games=None: None
+    
+    def run(scraper):
+        started[scraper.store_name] = time.monotonic()
+        current_store.set(scraper.store_name)
+        logger.info(f"Checking {scraper.store_name}...")
+        progress(scraper.store_name, 'running')
+        with span('scrape', store=scraper.store_name):
+            return profiled(scraper.scrape)
+    
+    run_start = time.monotonic()
+    run_deadline = run_start + total_timeout
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(scrapers))),
+                                  thread_name_prefix='scraper')
+    # Each worker runs in a copy of this context, so it sees the current run
+    pending = {executor.submit(contextvars.copy_context().run, run, scraper): scraper.store_name
+               for scraper in scrapers}
     
-    # Collect all games
-    all_games = []
-    for store_name in config.get('enabled_stores', []):
-        if store_name in scrapers:
-            logger.info(f"Checking {store_name}...")
-            games = scrapers[store_name].scrape()
+    try:
+        while pending:
+            now = time.monotonic()
+            if now >= run_deadline:
+                logger.error(f"Scrape run exceeded {total_timeout}s, abandoning: {', '.join(pending.values())}")
+                for store_name in pending.values():
+                    progress(store_name, 'timeout')
+                break
+            
+            # Expire stores that have been running longer than their own deadline
+            for future, store_name in list(pending.items()):
+                store_start = started.get(store_name)
+                if store_start is not None and now - store_start >= store_timeout:
+                    logger.error(f"{store_name} timed out after {store_timeout}s")
+                    progress(store_name, 'timeout')
+                    future.cancel()
+                    del pending[future]
+            if not pending:
+                break
             
-            for game in games:
-                db.add_game(game)
-                all_games.append(game)
+            # Wake up at the earliest deadline that could expire
+            next_deadline = run_deadline
+            for store_name in pending.values():
+                store_start = started.get(store_name)
+                if store_start is not None:
+                    next_deadline = min(next_deadline, store_start + store_timeout)
+            timeout = max(0.0, next_deadline - now)
+            if any(started.get(name) is None for name in pending.values()):
+                # Queued stores haven't started their clock yet, poll again soon
+                timeout = min(timeout, 1.0)
+            
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                store_name = pending.pop(future)
+                try:
+                    results[store_name] = future.result()
+                except Exception as e:
+                    logger.error(f"Error scraping {store_name}: {e}")
+                    progress(store_name, 'failed')
+                    continue
+                logger.info(f"{store_name} finished in {time.monotonic() - started[store_name]:.1f}s")
+                progress(store_name, 'done', len(results[store_name]))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    logger.info(f"Scraped {len(results)}/{len(scrapers)} stores in {time.monotonic() - run_start:.1f}s")
+    return results
+
+async def run_scrapers_async(scrapers: List[GameScraper],
+                             store_timeout: float = DEFAULT_STORE_TIMEOUT,
+                             total_timeout: float = DEFAULT_SCRAPE_TIMEOUT,
+                             progress: Optional[Callable] = None) -> Dict[str, List[Dict]]:
+    """
+    Run scrapers concurrently on the current event loop and collect results
+    as each store finishes. Same deadlines, progress callbacks and result
+    shape as run_scrapers.
+    """
+    results = {}
+    if not scrapers:
+        return results
+    
+    if progress is None:
+        progress = lambda store_name, status, games=None: None
+    
+    # Stores that already reported done, failed or timeout
+    reported = set()
+    
+    async def run(scraper):
+        current_store.set(scraper.store_name)
+        logger.info(f"Checking {scraper.store_name}...")
+        progress(scraper.store_name, 'running')
+        store_start = time.monotonic()
+        try:
+            with span('scrape', store=scraper.store_name):
+                games = await asyncio.wait_for(scraper.scrape_async(), timeout=store_timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"{scraper.store_name} timed out after {store_timeout}s")
+            reported.add(scraper.store_name)
+            progress(scraper.store_name, 'timeout')
+            return scraper.store_name, None
+        except Exception as e:
+            logger.error(f"Error scraping {scraper.store_name}: {e}")
+            reported.add(scraper.store_name)
+            progress(scraper.store_name, 'failed')
+            return scraper.store_name, None
+        logger.info(f"{scraper.store_name} finished in {time.monotonic() - store_start:.1f}s")
+        reported.add(scraper.store_name)
+        progress(scraper.store_name, 'done', len(games))
+        return scraper.store_name, games
+    
+    run_start = time.monotonic()
+    tasks = [asyncio.create_task(run(scraper)) for scraper in scrapers]
+    
+    try:
+        for finished in asyncio.as_completed(tasks, timeout=total_timeout):
+            store_name, games = await finished
+            if games is not None:
+                results[store_name] = games
+    except asyncio.TimeoutError:
+        unfinished = [scraper.store_name for scraper in scrapers if scraper.store_name not in reported]
+        logger.error(f"Scrape run exceeded {total_timeout}s, abandoning: {', '.join(unfinished)}")
+        for store_name in unfinished:
+            progress(store_name, 'timeout')
+    finally:
+        for task in tasks:
+            task.cancel()
+    
+    logger.info(f"Scraped {len(results)}/{len(scrapers)} stores in {time.monotonic() - run_start:.1f}s")
+    return results
+
+# Circuit breaker defaults (overridable in config.json)
+DEFAULT_CIRCUIT_FAILURES = 3            # consecutive failed checks before a store is skipped
+DEFAULT_CIRCUIT_OPEN_SECONDS = 3600     # how long it is skipped before a probe check
+DEFAULT_CIRCUIT_MAX_OPEN_SECONDS = 86400
+
+class CircuitBreaker:
+    """
+    Per-store circuit breaker backed by the store_health table.
+    
+    closed: the store is checked normally. After circuit_failures
+      consecutive failed checks the circuit opens.
+    open: the store is skipped until open_until, so a dead store doesn't
+      cost every run its request timeouts.
+    half_open: the next check after open_until is a probe. Success closes
+      the circuit; failure re-opens it for twice as long as last time, up
+      to circuit_max_open_seconds.
+    
+    A check fails when the store times out or raises, or when its requests
+    failed and it found no games.
+    """
+    
+    HISTORY_LENGTH = 20
+    
+    def __init__(self, db: Database, config: Dict):
+        self.db = db
+        self.threshold = config.get('circuit_failures', DEFAULT_CIRCUIT_FAILURES)
+        self.open_seconds = config.get('circuit_open_seconds', DEFAULT_CIRCUIT_OPEN_SECONDS)
+        self.max_open_seconds = config.get('circuit_max_open_seconds', DEFAULT_CIRCUIT_MAX_OPEN_SECONDS)
+        self.health = db.get_store_health()
+    
+    @staticmethod
+    def now(offset: float = 0) -> str:
+        return (datetime.utcnow() + timedelta(seconds=offset)).strftime('%Y-%m-%d %H:%M:%S')
+    
+    def allowed(self, stores: List[str]) -> List[str]:
+        """The stores that may be checked now; due open circuits go half-open for a probe"""
+        now = self.now()
+        allowed = []
+        for store in stores:
+            record = self.health.get(store)
+            if record and record['state'] == 'open':
+                if record['open_until'] and record['open_until'] > now:
+                    continue
+                record['state'] = 'half_open'
+                logger.info(f"{store}: circuit half-open, probing")
+            allowed.append(store)
+        return allowed
+    
+    @staticmethod
+    def failed(status: str, totals: Dict) -> bool:
+        if status != 'done':
+            return True
+        return totals.get('errors', 0) > 0 and not totals.get('games')
+    
+    def record(self, outcomes: Dict[str, Dict]):
+        """Update and save health from a run's per-store totals (RunStats.stores)"""
+        now = self.now()
+        updated = []
+        for store, totals in outcomes.items():
+            record = self.health.get(store) or {
+                'store': store, 'state': 'closed', 'consecutive_failures': 0, 'total_checks': 0,
+                'total_failures': 0, 'history': '', 'last_success': None, 'last_failure': None,
+                'last_error': None, 'open_until': None
+            }
+            failed = self.failed(totals.get('status', 'failed'), totals)
+            record['total_checks'] += 1
+            record['history'] = (record['history'] + ('-' if failed else '+'))[-self.HISTORY_LENGTH:]
+            
+            if failed:
+                record['total_failures'] += 1
+                record['consecutive_failures'] += 1
+                record['last_failure'] = now
+                record['last_error'] = totals.get('error') or totals.get('status', 'failed')
+                
+                # A failed probe re-opens straight away, for longer each time
+                if record['state'] == 'half_open' or record['consecutive_failures'] >= self.threshold:
+                    doublings = max(0, record['consecutive_failures'] - self.threshold)
+                    open_for = min(self.max_open_seconds, self.open_seconds * 2 ** doublings)
+                    if record['state'] != 'open':
+                        logger.warning(f"{store}: circuit opened after {record['consecutive_failures']} "
+                                       f"failed checks, skipping for {open_for / 60:.0f} minutes")
+                    record['state'] = 'open'
+                    record['open_until'] = self.now(open_for)
+            else:
+                if record['state'] != 'closed':
+                    logger.info(f"{store}: recovered, circuit closed")
+                record['state'] = 'closed'
+                record['consecutive_failures'] = 0
+                record['last_success'] = now
+                record['open_until'] = None
+            
+            self.health[store] = record
+            updated.append(record)
+        
+        if updated:
+            self.db.save_store_health(updated)
+    
+    def unhealthy(self, outcomes: Dict[str, Dict]) -> List[str]:
+        return [store for store, totals in outcomes.items() if self.failed(totals.get('status', 'failed'), totals)]
+
+def run_metrics(db: Database, history: int = 200) -> str:
+    """
+    Gauges from the runs table: the last check, and each store's latest
+    result. Checks can run in another process (the scheduler), so these
+    come from SQLite rather than the in-process registry.
+    """
+    gauges = Metrics()
+    runs = db.get_runs(limit=history)
+    
+    def timestamp(value: str) -> float:
+        return datetime.strptime(value, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc).timestamp()
+    
+    if runs:
+        gauges.set('fgc_last_run_timestamp_seconds', timestamp(runs[0]['finished_at']))
+        gauges.set('fgc_last_run_duration_seconds', runs[0]['duration_ms'] / 1000)
+    
+    # Polls cover a few stores each, so walk back to each store's latest
+    seen = set()
+    for run in runs:
+        for store, totals in run['details'].items():
+            if store in seen:
+                continue
+            seen.add(store)
+            gauges.set('fgc_store_up', int(totals.get('status') == 'done'), store=store)
+            gauges.set('fgc_store_games', totals.get('games', 0), store=store)
+            gauges.set('fgc_store_scrape_seconds', totals.get('seconds', 0), store=store)
+            gauges.set('fgc_store_last_check_timestamp_seconds', timestamp(run['finished_at']), store=store)
+    
+    for store, record in db.get_store_health().items():
+        gauges.set('fgc_store_circuit_open', int(record['state'] != 'closed'), store=store)
+    
+    return gauges.render() if runs else ''
+
+def build_scrapers(config: Dict, db: Database) -> Dict[str, GameScraper]:
+    """Scrapers for every enabled store, built-in and custom, keyed by store name"""
+    enabled = {name: SCRAPERS[name]() for name in config.get('enabled_stores', []) if name in SCRAPERS}
+    
+    # User-defined stores run alongside the built-in ones, one job per store
+    if config.get('custom_stores', True):
+        for scraper in CustomStoreScraper.from_database(db):
+            if scraper.store_name in SCRAPERS:
+                logger.warning(f"Skipping custom store '{scraper.store_name}': the name is taken by a built-in store")
+                continue
+            enabled[scraper.store_name] = scraper
+    
+    return enabled
+
+def enabled_store_names(config: Dict, db: Database) -> List[str]:
+    """Names of the stores build_scrapers() would build, without building them"""
+    names = [name for name in config.get('enabled_stores', []) if name in SCRAPERS]
+    if config.get('custom_stores', True):
+        names += [store['name'] for store in db.get_custom_stores() if store['name'] not in SCRAPERS]
+    return names
+
+def check_stores(config: Dict, db: Database, stores: Optional[List[str]] = None,
+                 progress: Optional[Callable] = None) -> Dict:
+    """
+    Scrape stores (all enabled ones by default), store the results and queue
+    newly-free games for the next digest. progress is passed on to the
+    scrape engine.
+    
+    Stores whose circuit breaker is open are skipped.
+    
+    Returns the scrape results, the diff against the previous check, the
+    stores whose results changed, the stores that failed and the stores
+    that were skipped.
+    """
+    scrapers = build_scrapers(config, db)
+    if stores is not None:
+        scrapers = {name: scrapers[name] for name in stores if name in scrapers}
+    
+    breaker = CircuitBreaker(db, config)
+    allowed = breaker.allowed(list(scrapers))
+    skipped = [name for name in scrapers if name not in allowed]
+    if skipped:
+        logger.info(f"Skipping stores with an open circuit: {', '.join(skipped)}")
+    enabled = [scrapers[name] for name in allowed]
+    
+    run = RunStats()
+    
+    def report(store_name: str, status: str, games: Optional[int] = None):
+        # Per-store timing, counts and errors for the metrics and the runs table
+        if status == 'running':
+            run.update(store_name, status=status, started=time.monotonic())
+        else:
+            seconds = time.monotonic() - run.stores.get(store_name, {}).get('started', run.start)
+            run.update(store_name, status=status, games=games or 0, seconds=round(seconds, 3))
+            METRICS.observe('fgc_scrape_seconds', seconds, store=store_name)
+            if status == 'done':
+                METRICS.inc('fgc_scrape_games_total', games or 0, store=store_name)
+            else:
+                METRICS.inc('fgc_scrape_errors_total', store=store_name, reason=status)
+        if progress is not None:
+            progress(store_name, status, games)
+    
+    # Scrape all enabled stores in parallel, on worker threads or one event loop
+    store_timeout = config.get('store_timeout', DEFAULT_STORE_TIMEOUT)
+    total_timeout = config.get('scrape_timeout', DEFAULT_SCRAPE_TIMEOUT)
+    token = current_run.set(run)
+    try:
+        if config.get('scrape_engine', 'threads') == 'async':
+            results = run_async(run_scrapers_async(enabled, store_timeout, total_timeout, report))
+        else:
+            results = run_scrapers(
+                enabled,
+                max_workers=config.get('scrape_workers', DEFAULT_SCRAPE_WORKERS),
+                store_timeout=store_timeout,
+                total_timeout=total_timeout,
+                progress=report
+            )
+    finally:
+        current_run.reset(token)
+    
+    # A store whose requests failed keeps its games from the last good check
+    unhealthy = breaker.unhealthy(run.stores)
+    results = {store: games for store, games in results.items() if store not in unhealthy}
+    
+    # Collect all games and work out what changed since the last check
+    all_games = [game for games in results.values() for game in games]
+    checked_stores = [store for store, games in results.items() if games]
+    diff = db.diff_games(all_games, list(results))
+    logger.info(f"{len(diff['new'])} new, {len(diff['active'])} still active, {len(diff['expired'])} expired games")
+    for game in diff['expired']:
+        logger.info(f"No longer free: {game['title']} ({game['store']})")
+    
+    # Store everything in one transaction
+    checked_at = db.current_timestamp()
+    counts = db.add_games(all_games)
+    db.mark_stores_checked(checked_stores, checked_at)
+    db.queue_digest(diff['new'])
+    breaker.record(run.stores)
+    db.refresh_current_games()
+    logger.info(f"Stored {len(all_games)} games ({counts['inserted']} inserted, {counts['updated']} updated)")
+    
+    # A store that returned nothing more likely failed than emptied out,
+    # so its missing games don't count as a change
+    changed = {game['store'] for game in diff['new']}
+    changed.update(game['store'] for game in diff['expired'] if game['store'] in checked_stores)
+    
+    db.record_run(run, diff)
+    
+    return {
+        'results': results,
+        'diff': diff,
+        'changed': changed,
+        'failed': [name for name in allowed if name not in results],
+        'skipped': skipped
+    }
+
+def send_digest(config: Dict, db: Database) -> int:
+    """Email games queued since the last digest; returns how many games were sent"""
+    # Only email newly-free games unless configured to send everything
+    new_only = config.get('email_new_only', True)
+    games = db.get_digest_games(new_only=new_only)
     
     # Sort games by platform order
-    sorted_games = sorted(all_games, key=lambda x: (
+    sorted_games = sorted(games, key=lambda x: (
         PLATFORM_ORDER.get(x.get('platform', 'PC'), 99),
         x['store'],
         x['title']
@@ -1185,44 +3405,346 @@ def check_and_send_games():
     
     if not recipients:
         logger.warning("No recipients configured")
-        return
+        return 0
     
-    if sorted_games:
-        email_sender = EmailSender(config)
-        email_sender.send_email(recipients, sorted_games)
-        logger.info(f"Found and sent {len(sorted_games)} free games")
-    else:
-        logger.info("No free games found this check")
+    if not sorted_games:
+        logger.info("No new free games found this check")
+        return 0
+    
+    email_sender = EmailSender(config)
+    failures = email_sender.send_email(recipients, sorted_games)
+    
+    # Keep the queue for the next digest if nobody got this one
+    if any(error is None for error in failures.values()):
+        db.clear_digest([game['id'] for game in games])
+    logger.info(f"Found and sent {len(sorted_games)} free games")
+    return len(sorted_games)
 
-def run_scheduler():
-    """Run the scheduler"""
-    config = load_config()
-    
-    day = config.get('schedule_day', 'friday').lower()
-    time_str = config.get('schedule_time', '09:00')
-    
-    day_map = {
-        'monday': schedule.every().monday,
-        'tuesday': schedule.every().tuesday,
-        'wednesday': schedule.every().wednesday,
-        'thursday': schedule.every().thursday,
-        'friday': schedule.every().friday,
-        'saturday': schedule.every().saturday,
-        'sunday': schedule.every().sunday
+def check_and_send_games(config: Optional[Dict] = None, db: Optional[Database] = None,
+                         progress: Optional[Callable] = None) -> Dict[str, int]:
+    """Main function to check stores and send emails; returns a summary of the run"""
+    logger.info("Starting game check...")
+    
+    if config is None:
+        config = load_config()
+    if db is None:
+        db = Database()
+    GameScraper.configure_http(config)
+    GooglePlayScraper.configure(config)
+    
+    # Cleanup old games (older than 7 days)
+    db.cleanup_old_games(days=7)
+    
+    outcome = check_stores(config, db, progress=progress)
+    emailed = send_digest(config, db)
+    
+    return {
+        'new': len(outcome['diff']['new']),
+        'active': len(outcome['diff']['active']),
+        'expired': len(outcome['diff']['expired']),
+        'failed_stores': len(outcome['failed']),
+        'skipped_stores': len(outcome['skipped']),
+        'emailed': emailed
     }
+
+# Starting poll interval per store in seconds, before adapting to how often it changes
+DEFAULT_POLL_INTERVALS = {
+    'Epic Games Store': 6 * 3600,   # weekly rotation
+    'Steam': 3600,                  # deals appear at random and can expire within hours
+    'Itch.io': 3600,
+    'GOG': 4 * 3600,
+    'Xbox Store': 6 * 3600,
+    'Nintendo Switch': 6 * 3600,
+    'Google Play Games': 6 * 3600,
+    'Humble Bundle': 12 * 3600,     # almost never changes
+    'Prime Gaming': 24 * 3600
+}
+DEFAULT_POLL_INTERVAL = 3 * 3600
+DEFAULT_POLL_MIN_INTERVAL = 15 * 60
+DEFAULT_POLL_MAX_INTERVAL = 24 * 3600
+DEFAULT_POLL_JITTER = 0.1
+CONFIG_CHECK_INTERVAL = 60  # seconds between config.json re-reads while idle
+
+class PollScheduler:
+    """
+    Polls each store on its own interval and sends email digests on a
+    separate cadence.
+    
+    A store's interval halves when its results change and grows by half
+    while they stay the same, within poll_min_interval..poll_max_interval
+    seconds. Failed polls retry with exponential backoff. All delays get
+    random jitter so stores drift apart, and the loop sleeps until the next
+    job is due, or at most CONFIG_CHECK_INTERVAL seconds when it follows
+    config.json. Learned intervals are kept in the settings table.
+    
+    Digests go out every digest_interval hours if set, otherwise weekly at
+    schedule_day/schedule_time.
+    """
     
-    if day in day_map:
-        day_map[day].at(time_str).do(check_and_send_games)
-        logger.info(f"Scheduled to run every {day.capitalize()} at {time_str}")
+    def __init__(self, config: Optional[Dict] = None, db: Optional[Database] = None):
+        # Without an explicit config, config.json is re-read before each run
+        self.reload_config = config is None
+        self.db = db or Database()
+        self.intervals = {}
+        self.failures = {}
+        self.next_due = {}
+        self.digests = None
+        self.digest_settings = None
+        self.configure(config if config is not None else load_config())
     
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
+    def configure(self, config: Dict):
+        self.config = config
+        self.min_interval = config.get('poll_min_interval', DEFAULT_POLL_MIN_INTERVAL)
+        self.max_interval = config.get('poll_max_interval', DEFAULT_POLL_MAX_INTERVAL)
+        self.jitter = config.get('poll_jitter', DEFAULT_POLL_JITTER)
+        GameScraper.configure_http(config)
+        GooglePlayScraper.configure(config)
+        
+        # Only rebuild on change: a new schedule restarts digest_interval's clock
+        digest_settings = tuple(config.get(key) for key in ('digest_interval', 'schedule_day', 'schedule_time'))
+        if digest_settings != self.digest_settings:
+            self.digest_settings = digest_settings
+            self.digests = self.digest_schedule(config)
+    
+    def digest_schedule(self, config: Dict) -> schedule.Scheduler:
+        """Digest jobs get their own schedule.Scheduler, separate from store polls"""
+        digests = schedule.Scheduler()
+        if config.get('digest_interval'):
+            digests.every(config['digest_interval']).hours.do(self.send_digest)
+            logger.info(f"Sending digests every {config['digest_interval']} hours")
+            return digests
+        
+        day = config.get('schedule_day', 'friday').lower()
+        time_str = config.get('schedule_time', '09:00')
+        if day in ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday'):
+            getattr(digests.every(), day).at(time_str).do(self.send_digest)
+            logger.info(f"Sending digests every {day.capitalize()} at {time_str}")
+        return digests
+    
+    def jittered(self, seconds: float) -> float:
+        return seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+    
+    def sync_stores(self, stores: List[str]):
+        """Start polling newly-enabled stores (right away) and forget disabled ones"""
+        added = [store for store in stores if store not in self.next_due]
+        if added:
+            saved = self.db.get_settings([f'poll_interval:{store}' for store in added])
+            now = time.monotonic()
+            for store in added:
+                interval = saved.get(f'poll_interval:{store}')
+                self.intervals[store] = float(interval) if interval else \
+                    self.config.get('poll_intervals', {}).get(store, DEFAULT_POLL_INTERVALS.get(store, DEFAULT_POLL_INTERVAL))
+                self.failures[store] = 0
+                self.next_due[store] = now
+        
+        for store in set(self.next_due) - set(stores):
+            del self.next_due[store]
+    
+    def record(self, store: str, changed: bool, failed: bool):
+        """Adapt a store's interval to the outcome of a poll and schedule its next one"""
+        interval = self.intervals[store]
+        if failed:
+            self.failures[store] += 1
+            delay = min(self.max_interval, self.min_interval * 2 ** (self.failures[store] - 1))
+        else:
+            self.failures[store] = 0
+            interval = interval / 2 if changed else interval * 1.5
+            interval = max(self.min_interval, min(self.max_interval, interval))
+            self.intervals[store] = delay = interval
+        self.next_due[store] = time.monotonic() + self.jittered(delay)
+    
+    def poll(self, stores: List[str]):
+        """Check the given stores in one concurrent run"""
+        logger.info(f"Polling {', '.join(stores)}")
+        try:
+            outcome = check_stores(self.config, self.db, stores)
+            # A skipped store backs off too, so it isn't re-polled until its circuit is due
+            changed, failed = outcome['changed'], set(outcome['failed']) | set(outcome['skipped'])
+        except Exception as e:
+            logger.error(f"Error polling stores: {e}")
+            changed, failed = set(), set(stores)
+        
+        for store in stores:
+            self.record(store, store in changed, store in failed)
+        self.db.set_settings({f'poll_interval:{store}': str(round(self.intervals[store])) for store in stores})
+        logger.info('Next polls: ' + ', '.join(
+            f"{store} in {(self.next_due[store] - time.monotonic()) / 60:.0f}m" for store in stores
+        ))
+    
+    def send_digest(self):
+        try:
+            self.db.cleanup_old_games(days=7)
+            send_digest(self.config, self.db)
+        except Exception as e:
+            logger.error(f"Error sending digest: {e}")
+    
+    def run_pending(self):
+        """Run every job that is due; returns seconds to sleep before calling again"""
+        # Pick up store and email settings changed from the web UI
+        if self.reload_config:
+            config = load_config()
+            if config != self.config:
+                self.configure(config)
+        self.sync_stores(enabled_store_names(self.config, self.db))
+        
+        now = time.monotonic()
+        due = [store for store, at in self.next_due.items() if at <= now]
+        if due:
+            self.poll(due)
+        self.digests.run_pending()
+        
+        next_store = min(self.next_due.values(), default=time.monotonic() + self.max_interval)
+        next_digest = self.digests.idle_seconds
+        wait_seconds = next_store - time.monotonic()
+        if next_digest is not None:
+            wait_seconds = min(wait_seconds, next_digest)
+        # Wake up regularly to apply settings changed from the web UI
+        if self.reload_config:
+            wait_seconds = min(wait_seconds, CONFIG_CHECK_INTERVAL)
+        return max(1.0, wait_seconds)
+    
+    def run_forever(self):
+        while True:
+            wait_seconds = self.run_pending()
+            logger.debug(f"Sleeping {wait_seconds:.0f}s")
+            time.sleep(wait_seconds)
+
+class JobQueue:
+    """
+    Runs background jobs from the jobs table on a worker thread, so web
+    requests only have to queue them.
+    
+    handlers maps a job kind to a function called as handler(progress) that
+    returns a JSON-serializable result or raises on failure. progress has
+    the run_scrapers callback signature and is saved with the job as it
+    runs. Only one job of each kind can be queued or running at a time;
+    submitting another returns the existing one.
+    """
+    
+    poll_interval = 5  # seconds, to pick up jobs queued by other processes
+    
+    def __init__(self, handlers: Dict[str, Callable], db: Optional[Database] = None):
+        self.handlers = handlers
+        self._db = db
+        self.wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+    
+    @property
+    def db(self) -> Database:
+        # Opened on first use, so creating a queue at import time doesn't touch the database
+        if self._db is None:
+            self._db = Database()
+        return self._db
+    
+    def submit(self, kind: str) -> Dict:
+        """Queue a job of the given kind; returns {'id': ..., 'created': ...}"""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = self.db.create_job(kind)
+        self.start()
+        self.wakeup.set()
+        return job
+    
+    def start(self):
+        """Start the worker thread, once per process"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self.run_forever, name='job-worker', daemon=True)
+                self._thread.start()
+    
+    def run_forever(self):
+        while True:
+            # Clear before looking so a submit() during the claim isn't missed
+            self.wakeup.clear()
+            try:
+                job = self.db.claim_job(list(self.handlers))
+            except sqlite3.Error as e:
+                logger.error(f"Error claiming job: {e}")
+                job = None
+            
+            if job is None:
+                self.wakeup.wait(self.poll_interval)
+            else:
+                self.run_job(job)
+    
+    def run_job(self, job: Dict):
+        progress = {}
+        progress_lock = threading.Lock()
+        
+        def report(store_name: str, status: str, games: Optional[int] = None):
+            with progress_lock:
+                progress[store_name] = {'status': status} if games is None else {'status': status, 'games': games}
+                self.db.update_job_progress(job['id'], progress)
+        
+        logger.info(f"Running {job['kind']} job {job['id']}")
+        try:
+            result = self.handlers[job['kind']](report)
+        except Exception as e:
+            logger.error(f"{job['kind']} job {job['id']} failed: {e}")
+            self.db.finish_job(job['id'], error=str(e) or type(e).__name__)
+        else:
+            self.db.finish_job(job['id'], result=result)
+            logger.info(f"{job['kind']} job {job['id']} finished")
+
+TRACE_DIR = '/var/lib/free-game-checker/traces'
+
+def run_profiled_check(trace_file: Optional[str] = None, use_cprofile: bool = False,
+                       use_tracemalloc: bool = False) -> str:
+    """
+    Run check_and_send_games while recording a trace of every store,
+    fetch, parse, database call and email render/send; returns the trace
+    file's path.
+    
+    cProfile covers the main thread and the thread engine's store workers
+    (not the async engine's to_thread helpers). tracemalloc records peak
+    memory and the largest allocation sites still alive at the end.
+    """
+    trace = Trace(cprofile=use_cprofile)
+    if use_tracemalloc:
+        import tracemalloc
+        tracemalloc.start()
+    
+    token = current_trace.set(trace)
+    try:
+        with span('check'):
+            result = trace.profile_call(check_and_send_games)
+    finally:
+        current_trace.reset(token)
+    
+    snapshot, peak = None, 0
+    if use_tracemalloc:
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+    
+    path = trace_file or os.path.join(TRACE_DIR, f"trace-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    trace.save(path, snapshot, peak, result)
+    logger.info(f"Trace of {len(trace.spans)} spans written to {path}")
+    return path
+
+def run_scheduler():
+    """Run the scheduler"""
+    PollScheduler().run_forever()
 
 if __name__ == '__main__':
-    import sys
+    setup_logging()
     
     if len(sys.argv) > 1 and sys.argv[1] == 'check-now':
-        check_and_send_games()
+        import argparse
+        parser = argparse.ArgumentParser(prog='app.py check-now', description='Check all stores and email new games now')
+        parser.add_argument('--profile', action='store_true',
+                            help='record a trace of the run (stores, fetches, parses, DB calls, email)')
+        parser.add_argument('--cprofile', action='store_true', help='with --profile, attach cProfile stats')
+        parser.add_argument('--tracemalloc', action='store_true', help='with --profile, attach a tracemalloc snapshot')
+        parser.add_argument('--trace-file', help=f'where to write the trace (default: {TRACE_DIR}/trace-<time>.json)')
+        args = parser.parse_args(sys.argv[2:])
+        
+        if args.profile:
+            print(run_profiled_check(args.trace_file, args.cprofile, args.tracemalloc))
+        else:
+            check_and_send_games()
     else:
         run_scheduler()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Free Game Checker - Offline Benchmarks
+Replays recorded store responses through the scrapers and the full check
+pipeline, so performance can be measured without network access. Also
+times cold starts (importing app and web) in fresh interpreters.
+
+Usage:
+    python3 benchmark.py                       # print results
+    python3 benchmark.py --json out.json       # also save results
+    python3 benchmark.py --compare base.json   # exit 1 on regressions
+"""
+
+import argparse
+import io
+import json
+import os
+import shutil
+import socketserver
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Dict, List
+
+import requests
+from requests.adapters import BaseAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import app
+from app import (GameScraper, Database, EpicGamesScraper, SteamScraper, GOGScraper,
+                 HumbleBundleScraper, ItchIOScraper, NintendoSwitchScraper, XboxScraper)
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(APP_DIR, 'fixtures')
+
+# URL prefix -> (fixture file, content type)
+FIXTURES = {
+    'https://store-site-backend-static.ak.epicgames.com/freeGamesPromotions': ('epic_free_games.json', 'application/json'),
+    'https://steamdb.info/upcoming/free/': ('steamdb_free.html', 'text/html'),
+    'https://store.steampowered.com/search/': ('steam_search.html', 'text/html'),
+    'https://www.gog.com/en/games': ('gog_games.html', 'text/html'),
+    'https://www.humblebundle.com/store': ('humble_store.html', 'text/html'),
+    'https://itch.io/games/on-sale': ('itch_on_sale.html', 'text/html'),
+    'https://searching.nintendo-europe.com/en/select': ('nintendo_select.json', 'application/json'),
+    'https://www.xbox.com/en-AU/games/browse/DynamicChannel.GameDeals': ('xbox_deals.html', 'text/html')
+}
+
+# Scrapers that only talk HTTP through GameScraper.get (Google Play uses its own client)
+SCRAPERS = [EpicGamesScraper, SteamScraper, GOGScraper, HumbleBundleScraper,
+            ItchIOScraper, NintendoSwitchScraper, XboxScraper]
+
+# Cold start scenarios, each timed in a fresh interpreter
+STARTUP_SCRIPTS = {
+    'import app': 'import app',
+    'import web': 'import web',
+    'check-now setup': "import app; app.build_scrapers({'enabled_stores': ['Steam', 'GOG'], 'custom_stores': False}, None)"
+}
+
+# Dependencies that should only be imported once they're actually used
+HEAVY_MODULES = ('requests', 'bs4', 'soupsieve', 'smtplib', 'email.mime', 'schedule', 'google_play_scraper')
+
+class FixtureAdapter(BaseAdapter):
+    """Transport adapter that answers requests from recorded fixture files"""
+
+    def __init__(self, fixture_dir: str = FIXTURE_DIR):
+        super().__init__()
+        self.fixture_dir = fixture_dir
+        self.bodies = {}
+        self.bytes_served = 0
+        for prefix, (filename, content_type) in FIXTURES.items():
+            with open(os.path.join(fixture_dir, filename), 'rb') as f:
+                self.bodies[prefix] = (f.read(), content_type)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.encoding = 'utf-8'
+
+        for prefix, (body, content_type) in self.bodies.items():
+            if request.url.startswith(prefix):
+                response.status_code = 200
+                response.headers['Content-Type'] = f'{content_type}; charset=utf-8'
+                response.headers['Content-Length'] = str(len(body))
+                response.raw = CountingBody(body, self)
+                break
+        else:
+            response.status_code = 404
+            response.raw = CountingBody(b'', self)
+
+        if not stream:
+            response.content
+        return response
+
+    def close(self):
+        pass
+
+class CountingBody(io.BytesIO):
+    """Response body that counts how many bytes the client actually read"""
+
+    def __init__(self, body: bytes, adapter: FixtureAdapter):
+        super().__init__(body)
+        self.adapter = adapter
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.adapter.bytes_served += len(data)
+        return data
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept messages without STARTTLS or AUTH"""
+
+    def handle(self):
+        self.reply('220 benchmark stub')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command == b'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b'.\n', b''):
+                    pass
+                self.server.messages += 1
+                self.reply('250 Queued')
+            elif command == b'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+    def reply(self, text: str):
+        self.wfile.write(text.encode('ascii') + b'\r\n')
+
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubSMTPHandler)
+        self.messages = 0
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+def install_fixtures(config: Dict) -> FixtureAdapter:
+    """Route the shared scraper session to the fixture files"""
+    GameScraper.configure_http(config)
+    adapter = FixtureAdapter()
+    session = GameScraper.session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return adapter
+
+def measure(func, iterations: int) -> Dict:
+    """
+    Run func repeatedly for wall time, then once more under tracemalloc
+    for peak memory and allocations still alive when it returns.
+    """
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    return {
+        'median_ms': round(statistics.median(times) * 1000, 3),
+        'min_ms': round(min(times) * 1000, 3),
+        'peak_kb': round(peak / 1024, 1),
+        'retained_blocks': sum(stat.count for stat in snapshot.statistics('filename')),
+        'result': result
+    }
+
+def bench_scrapers(iterations: int) -> Dict[str, Dict]:
+    """Benchmark each scraper's fetch + parse against its fixtures"""
+    # Fixtures answer instantly, so per-host rate limits would only measure sleeps
+    adapter = install_fixtures({'http_cache': False, 'http': {'rate_limit': 0}})
+    results = {}
+
+    for scraper_class in SCRAPERS:
+        scraper = scraper_class()
+        scraper.scrape()  # warm up imports and caches
+        served_before = adapter.bytes_served
+        stats = measure(scraper.scrape, iterations)
+        games = stats.pop('result')
+        stats['games'] = len(games)
+        stats['bytes_per_scrape'] = (adapter.bytes_served - served_before) // (iterations + 1)
+        results[scraper.store_name] = stats
+
+    return results
+
+def bench_pipeline(iterations: int, recipients: int) -> Dict:
+    """Benchmark check_and_send_games end to end against a stub SMTP server"""
+    smtp = StubSMTPServer()
+    work_dir = tempfile.mkdtemp(prefix='fgc-bench-')
+
+    try:
+        config = {
+            'email_sender': 'bench@example.com',
+            'email_password': '',
+            'smtp_server': '127.0.0.1',
+            'smtp_port': smtp.server_address[1],
+            'smtp_starttls': False,
+            'email_rate_limit': 0,
+            'email_new_only': False,
+            'http_cache': False,
+            'http': {'rate_limit': 0},
+            'enabled_stores': [scraper_class().store_name for scraper_class in SCRAPERS]
+        }
+        db = Database(os.path.join(work_dir, 'games.db'))
+        with db.connection() as conn:
+            conn.executemany('INSERT INTO recipients (email) VALUES (?)',
+                             [(f'user{i}@example.com',) for i in range(recipients)])
+
+        # check_and_send_games reconfigures the session, so re-mount on each run
+        original_configure = GameScraper.configure_http
+
+        def configure_with_fixtures(config):
+            original_configure(config)
+            session = GameScraper.session()
+            adapter = FixtureAdapter()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+
+        GameScraper.configure_http = staticmethod(configure_with_fixtures)
+        try:
+            stats = measure(lambda: app.check_and_send_games(config=config, db=db), iterations)
+        finally:
+            GameScraper.configure_http = original_configure
+
+        stats.pop('result')
+        stats['recipients'] = recipients
+        stats['emails_per_run'] = smtp.messages // (iterations + 1)
+        return stats
+    finally:
+        smtp.shutdown()
+        smtp.server_close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def bench_startup(iterations: int) -> Dict[str, Dict]:
+    """Time each startup scenario in fresh interpreters and note which heavy modules it loaded"""
+    results = {}
+    for name, code in STARTUP_SCRIPTS.items():
+        script = (
+            "import sys, time\n"
+            "start = time.perf_counter()\n"
+            f"{code}\n"
+            "elapsed = time.perf_counter() - start\n"
+            f"print(elapsed, *[m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+        )
+        times = []
+        # The first run writes bytecode caches and isn't counted
+        for _ in range(iterations + 1):
+            output = subprocess.run([sys.executable, '-c', script], cwd=APP_DIR, check=True,
+                                    capture_output=True, text=True).stdout
+            elapsed, *loaded = output.splitlines()[-1].split()
+            times.append(float(elapsed))
+        times = times[1:]
+        results[name] = {
+            'median_ms': round(statistics.median(times) * 1000, 3),
+            'min_ms': round(min(times) * 1000, 3),
+            'heavy_modules': loaded
+        }
+    return results
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """List timings that got slower than baseline by more than threshold"""
+    regressions = []
+    pairs = [(f'scraper {name}', stats, baseline.get('scrapers', {}).get(name))
+             for name, stats in results['scrapers'].items()]
+    pairs.append(('pipeline', results['pipeline'], baseline.get('pipeline')))
+    pairs += [(f'startup {name}', stats, baseline.get('startup', {}).get(name))
+              for name, stats in results['startup'].items()]
+
+    for name, stats, base in pairs:
+        if not base:
+            continue
+        if stats['median_ms'] > base['median_ms'] * threshold:
+            regressions.append(f"{name}: {base['median_ms']}ms -> {stats['median_ms']}ms")
+        if 'games' in stats and stats['games'] != base.get('games'):
+            regressions.append(f"{name}: found {stats['games']} games, baseline found {base.get('games')}")
+    return regressions
+
+def print_results(results: Dict):
+    print(f"{'Store':<20} {'median ms':>10} {'min ms':>10} {'peak KB':>10} {'retained':>8} {'KB in':>8} {'games':>6}")
+    for name, stats in results['scrapers'].items():
+        print(f"{name:<20} {stats['median_ms']:>10} {stats['min_ms']:>10} {stats['peak_kb']:>10} "
+              f"{stats['retained_blocks']:>8} {stats['bytes_per_scrape'] // 1024:>8} {stats['games']:>6}")
+
+    pipeline = results['pipeline']
+    print()
+    print(f"check_and_send_games: median {pipeline['median_ms']}ms, min {pipeline['min_ms']}ms, "
+          f"peak {pipeline['peak_kb']}KB, {pipeline['emails_per_run']} emails to {pipeline['recipients']} recipients")
+    
+    print()
+    for name, stats in results['startup'].items():
+        print(f"{name + ':':<17} median {stats['median_ms']}ms, min {stats['min_ms']}ms, "
+              f"loads {', '.join(stats['heavy_modules']) or 'no heavy modules'}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmarks for Free Game Checker')
+    parser.add_argument('--iterations', type=int, default=20, help='runs per measurement')
+    parser.add_argument('--recipients', type=int, default=50, help='recipients for the pipeline run')
+    parser.add_argument('--json', metavar='FILE', help='write results as JSON')
+    parser.add_argument('--compare', metavar='FILE', help='baseline JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=1.25, help='allowed slowdown vs baseline')
+    parser.add_argument('--full-parse', action='store_true',
+                        help='parse whole documents with html.parser, for comparison with the fast path')
+    args = parser.parse_args()
+
+    if args.full_parse:
+        app.HTML_PARSER = 'html.parser'
+        app.STRAIN_HTML = False
+
+    # Keep scraper logging from drowning out the results
+    app.logger.setLevel('WARNING')
+
+    results = {
+        'scrapers': bench_scrapers(args.iterations),
+        'pipeline': bench_pipeline(max(1, args.iterations // 4), args.recipients),
+        'startup': bench_startup(max(3, args.iterations // 4))
+    }
+    print_results(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print()
+            print("Regressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
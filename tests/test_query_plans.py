@@ -0,0 +1,82 @@
+"""
+EXPLAIN QUERY PLAN checks for the queries on the check and dashboard hot
+paths. Each test runs the real Database method, captures the SQL it sent
+(with parameters filled in) and asserts SQLite plans it with the index it
+was written for, so a schema or query change that falls back to a table
+scan fails here instead of slowing down production.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app import Database
+
+
+def make_game(title, store='Steam', platform='PC', end_date=''):
+    return {
+        'title': title, 'store': store, 'platform': platform, 'description': '', 'image_url': '',
+        'game_url': '', 'original_price': '', 'end_date': end_date, 'store_logo': ''
+    }
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / 'games.db'))
+    # Like a long-running install: mostly expired giveaways, a few live ones
+    db.add_games([make_game(f'Game {i}', store=store, end_date='2020-01-01' if i else '2999-01-01')
+                  for i in range(50) for store in ('Steam', 'GOG')])
+    yield db
+    db.close()
+
+
+def executed_sql(db, call):
+    """The statements call() ran on this thread's connection"""
+    statements = []
+    conn = db.connection()
+    conn.set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        conn.set_trace_callback(None)
+    return statements
+
+
+def assert_planned_with(db, call, fragment, index):
+    """Every statement containing fragment that call() ran must use index"""
+    statements = [sql for sql in executed_sql(db, call) if fragment in ' '.join(sql.split())]
+    assert statements, f"no statement containing {fragment!r} was run"
+    for sql in statements:
+        plan = [row[3] for row in db.connection().execute(f'EXPLAIN QUERY PLAN {sql}')]
+        assert any(index in detail for detail in plan), f"{sql}\nplanned as: {'; '.join(plan)}"
+
+
+def test_recent_games_uses_last_seen_index(db):
+    assert_planned_with(db, db.get_recent_games, 'FROM games WHERE last_seen >=', 'idx_games_last_seen')
+
+
+def test_cleanup_uses_last_seen_index(db):
+    assert_planned_with(db, db.cleanup_old_games, 'DELETE FROM games WHERE last_seen <', 'idx_games_last_seen')
+
+
+def test_current_games_uses_last_seen_index(db):
+    db.refresh_current_games()
+    assert_planned_with(db, db.get_current_games, 'FROM current_games', 'idx_current_games_last_seen')
+
+
+def test_refresh_current_games_uses_expires_at_index(db):
+    assert_planned_with(db, db.refresh_current_games, 'INSERT INTO current_games', 'idx_games_expires_at')
+
+
+def test_games_page_uses_last_seen_index(db):
+    first_page = db.query_games(limit=5)
+    after = (first_page[-1]['last_seen'], first_page[-1]['id'])
+    assert_planned_with(db, lambda: db.query_games(after=after, limit=5), 'FROM games WHERE (last_seen, id) <',
+                        'idx_games_last_seen')
+
+
+def test_diff_games_uses_store_index(db):
+    assert_planned_with(db, lambda: db.diff_games([make_game('Game 1')], ['Steam']),
+                        'FROM games WHERE store IN', 'idx_games_store_last_seen')
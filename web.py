@@ -6,14 +6,19 @@ Manage settings, recipients, and view games
 
 from flask import Flask, render_template, request, jsonify, redirect, url_for
 import json
+import re
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import os
 import sys
+import threading
+import base64
+import hashlib
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(__file__))
-from app import Database, load_config, check_and_send_games, EmailSender
+from app import (Database, load_config, check_and_send_games, EmailSender, JobQueue,
+                 METRICS, run_metrics, setup_logging, SCRAPERS)
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-change-this'
@@ -21,59 +26,172 @@ app.secret_key = 'your-secret-key-change-this'
 CONFIG_FILE = '/etc/free-game-checker/config.json'
 DB_FILE = '/var/lib/free-game-checker/games.db'
 
+class DashboardCache:
+    """
+    Rendered-dashboard inputs kept in memory between requests.
+    
+    Entries are keyed on the database's data version (bumped whenever a
+    check, cleanup or web edit changes what the dashboard shows) and the
+    config file's mtime, and also expire when the next shown game does.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.key = None
+        self.context = None
+        self.valid_until = None
+    
+    def get(self, db: Database) -> dict:
+        try:
+            config_mtime = os.stat(CONFIG_FILE).st_mtime_ns
+        except OSError:
+            config_mtime = None
+        key = (db.db_path, db.data_version(), config_mtime)
+        now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        
+        with self.lock:
+            if key == self.key and (self.valid_until is None or now < self.valid_until):
+                return self.context
+        
+        context, valid_until = self.build(db)
+        with self.lock:
+            self.key, self.context, self.valid_until = key, context, valid_until
+        return context
+    
+    @staticmethod
+    def build(db: Database):
+        config = load_config()
+        
+        # Unexpired games from enabled stores, seen in the last 7 days
+        enabled_stores = config.get('enabled_stores', [])
+        if config.get('custom_stores', True):
+            enabled_stores = enabled_stores + [store['name'] for store in db.get_custom_stores()]
+        enabled = set(enabled_stores)
+        current_games = [game for game in db.get_current_games(hours=168) if game['store'] in enabled]
+        
+        recipients = db.get_recipients()
+        
+        # Rebuild when the first game expires or the oldest one ages out
+        deadlines = [game['expires_at'] for game in current_games if game['expires_at']]
+        if current_games:
+            oldest = min(game['last_seen'] for game in current_games)
+            aged_out = datetime.strptime(oldest, '%Y-%m-%d %H:%M:%S') + timedelta(hours=168)
+            deadlines.append(aged_out.strftime('%Y-%m-%d %H:%M:%S'))
+        
+        context = {
+            'games': current_games,
+            'recipients': recipients,
+            'config': config,
+            'game_count': len(current_games),
+            'recipient_count': len(recipients),
+            # Count actual enabled stores
+            'store_count': len(enabled_stores),
+            'store_health': [health for store, health in db.get_store_health().items() if store in enabled]
+        }
+        return context, min(deadlines, default=None)
+
+dashboard_cache = DashboardCache()
+
+@app.teardown_appcontext
+def release_database(error=None):
+    # Each request runs on its own thread; pass its connection on to the next one
+    Database.release()
+
 @app.route('/')
 def index():
     """Main dashboard"""
-    db = Database()
-    config = load_config()
+    return render_template('index.html', **dashboard_cache.get(Database()))
+
+def list_arg(name: str) -> list:
+    """A query parameter given repeatedly and/or comma-separated"""
+    return [value.strip() for arg in request.args.getlist(name) for value in arg.split(',') if value.strip()]
+
+def timestamp_arg(name: str):
+    """
+    A query bound parsed as an ISO date or time and normalized to UTC;
+    raises ValueError if unreadable.
+    
+    A bare date means the start of that day. *_after bounds include it and
+    *_before bounds exclude it, so first_seen_after=2024-05-01 and
+    first_seen_before=2024-05-02 select exactly May 1st.
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
+    cleaned = re.sub(r'\s*(UTC|GMT)$', '', value.strip(), flags=re.IGNORECASE)
+    try:
+        bound = datetime.fromisoformat(cleaned.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f'Invalid {name}: {value}')
+    if bound.tzinfo is not None:
+        bound = bound.astimezone(timezone.utc).replace(tzinfo=None)
+    return bound.strftime('%Y-%m-%d %H:%M:%S')
+
+def encode_cursor(game: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps([game['last_seen'], game['id']]).encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        last_seen, game_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(last_seen), int(game_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+@app.route('/api/games')
+def api_games():
+    """
+    Games history as JSON, newest first, a page at a time.
     
-    # Get recent games (last 7 days)
-    all_games = db.get_recent_games(hours=168)
+    Filters: store, platform (repeat or comma-separate), expires_after,
+    expires_before, first_seen_after, first_seen_before (ISO dates or
+    times, UTC unless zoned; after is inclusive, before exclusive). fields picks the returned columns. Pass the
+    previous response's next_cursor as cursor for the next page.
+    """
+    db = Database()
     
-    # Filter games by enabled stores only
-    enabled_stores = config.get('enabled_stores', [])
-    games_from_enabled_stores = [game for game in all_games if game['store'] in enabled_stores]
+    # The data version changes on every write, so a matching ETag means
+    # this exact page is unchanged and nothing needs to be queried
+    etag = hashlib.sha1(f'{db.data_version()}?{request.query_string.decode()}'.encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        return '', 304, {'ETag': f'"{etag}"'}
     
-    # Filter out expired games by checking end_date
-    current_games = []
-    for game in games_from_enabled_stores:
-        end_date = game.get('end_date', '')
-        
-        # If no end date, keep the game (still available)
-        if not end_date or end_date in ['', 'Limited time', 'Monthly rotation', 'Limited time sale']:
-            current_games.append(game)
-            continue
+    try:
+        limit = min(max(int(request.args.get('limit', 100)), 1), 500)
+        fields = list_arg('fields') or None
+        unknown = set(fields or []) - set(Database.GAME_API_FIELDS)
+        if unknown:
+            raise ValueError(f'Unknown fields: {", ".join(sorted(unknown))}')
+        after = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
         
-        # Try to parse the end date and check if expired
-        try:
-            # Handle ISO format dates (from Epic Games API)
-            if 'T' in end_date or 'Z' in end_date:
-                # Remove timezone info for simple comparison
-                end_date_clean = end_date.replace('Z', '').split('+')[0].split('.')[0]
-                end_datetime = datetime.fromisoformat(end_date_clean)
-                
-                # Compare to current time (naive comparison, assumes UTC)
-                if end_datetime > datetime.utcnow():
-                    current_games.append(game)
-            else:
-                # For other date formats, keep the game (can't parse reliably)
-                current_games.append(game)
-        except Exception as e:
-            # If we can't parse the date, keep the game to be safe
-            current_games.append(game)
-    
-    recipients = db.get_recipients()
+        games = db.query_games(
+            stores=list_arg('store'),
+            platforms=list_arg('platform'),
+            expires_after=timestamp_arg('expires_after'),
+            expires_before=timestamp_arg('expires_before'),
+            first_seen_after=timestamp_arg('first_seen_after'),
+            first_seen_before=timestamp_arg('first_seen_before'),
+            after=after,
+            limit=limit + 1,
+            fields=fields
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Count actual enabled stores
-    store_count = len(enabled_stores)
+    # One extra row tells us whether there is another page
+    next_cursor = encode_cursor(games[limit - 1]) if len(games) > limit else None
+    games = games[:limit]
+    if fields:
+        games = [{field: game[field] for field in fields} for game in games]
     
-    return render_template('index.html', 
-                         games=current_games, 
-                         recipients=recipients,
-                         config=config,
-                         game_count=len(current_games),
-                         recipient_count=len(recipients),
-                         store_count=store_count)
+    response = jsonify({'games': games, 'count': len(games), 'next_cursor': next_cursor})
+    response.set_etag(etag)
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics: this process's registry plus the latest check results from the database"""
+    body = METRICS.render() + run_metrics(Database())
+    return body, 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
 
 @app.route('/settings')
 def settings():
@@ -103,11 +221,9 @@ def manage_recipients():
             return jsonify({'error': 'Invalid email address'}), 400
         
         try:
-            conn = sqlite3.connect(DB_FILE)
-            cursor = conn.cursor()
-            cursor.execute('INSERT INTO recipients (email) VALUES (?)', (email,))
-            conn.commit()
-            conn.close()
+            with db.connection() as conn:
+                conn.execute('INSERT INTO recipients (email) VALUES (?)', (email,))
+            db.bump_data_version()
             return jsonify({'success': True, 'message': f'Added {email}'})
         except sqlite3.IntegrityError:
             return jsonify({'error': 'Email already exists'}), 400
@@ -119,11 +235,9 @@ def manage_recipients():
         email = data.get('email', '')
         
         try:
-            conn = sqlite3.connect(DB_FILE)
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM recipients WHERE email = ?', (email,))
-            conn.commit()
-            conn.close()
+            with db.connection() as conn:
+                conn.execute('DELETE FROM recipients WHERE email = ?', (email,))
+            db.bump_data_version()
             return jsonify({'success': True, 'message': f'Removed {email}'})
         except Exception as e:
             return jsonify({'error': str(e)}), 500
@@ -160,53 +274,89 @@ def manage_config():
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
-@app.route('/api/test-email', methods=['POST'])
-def test_email():
-    """Send a test email"""
+def send_test_email(progress) -> dict:
+    """Send a test email to every recipient (runs as a background job)"""
+    config = load_config()
+    db = Database()
+    
+    # Get a few games for testing
+    games = db.get_recent_games(hours=168)[:3]
+    
+    if not games:
+        # Create a dummy game for testing
+        games = [{
+            'title': 'Test Game',
+            'store': 'Test Store',
+            'description': 'This is a test email from Free Game Checker',
+            'image_url': '',
+            'game_url': 'https://example.com',
+            'original_price': '$9.99',
+            'end_date': '',
+            'store_logo': ''
+        }]
+    
+    recipients = db.get_recipients()
+    if not recipients:
+        raise ValueError('No recipients configured')
+    
+    email_sender = EmailSender(config)
+    results = email_sender.send_email(recipients, games)
+    
+    failed = {recipient: error for recipient, error in results.items() if error is not None}
+    if failed:
+        raise RuntimeError(f'Test email failed for {len(failed)} of {len(recipients)} recipient(s): ' +
+                           ', '.join(f'{recipient} ({error})' for recipient, error in failed.items()))
+    
+    return {'sent': len(recipients)}
+
+def run_check(progress) -> dict:
+    """Check all stores and email new games (runs as a background job)"""
+    return check_and_send_games(progress=progress)
+
+jobs = JobQueue({
+    'check': run_check,
+    'test-email': send_test_email
+})
+
+def submit_job(kind: str, started_message: str, running_message: str):
+    """Queue a job and answer with its id for /api/jobs/<id> polling"""
     try:
-        config = load_config()
-        db = Database()
-        
-        # Get a few games for testing
-        games = db.get_recent_games(hours=168)[:3]
-        
-        if not games:
-            # Create a dummy game for testing
-            games = [{
-                'title': 'Test Game',
-                'store': 'Test Store',
-                'description': 'This is a test email from Free Game Checker',
-                'image_url': '',
-                'game_url': 'https://example.com',
-                'original_price': '$9.99',
-                'end_date': '',
-                'store_logo': ''
-            }]
-        
-        recipients = db.get_recipients()
-        if not recipients:
-            return jsonify({'error': 'No recipients configured'}), 400
-        
-        email_sender = EmailSender(config)
-        email_sender.send_email(recipients, games)
-        
-        return jsonify({'success': True, 'message': f'Test email sent to {len(recipients)} recipient(s)'})
+        job = jobs.submit(kind)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    
+    return jsonify({
+        'success': True,
+        'job_id': job['id'],
+        'message': started_message if job['created'] else running_message,
+        'status_url': url_for('job_status', job_id=job['id'])
+    }), 202
+
+@app.route('/api/test-email', methods=['POST'])
+def test_email():
+    """Send a test email in the background"""
+    if not Database().get_recipients():
+        return jsonify({'error': 'No recipients configured'}), 400
+    return submit_job('test-email', 'Sending test email', 'A test email is already being sent')
 
 @app.route('/api/check-now', methods=['POST'])
 def check_now():
-    """Manually trigger a game check"""
-    try:
-        check_and_send_games()
-        return jsonify({'success': True, 'message': 'Game check completed'})
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    """Manually trigger a game check in the background"""
+    return submit_job('check', 'Game check started', 'A game check is already running')
+
+@app.route('/api/jobs/<int:job_id>')
+def job_status(job_id):
+    """Status, per-store progress and result of a background job"""
+    job = Database().get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
 
 @app.route('/api/stores/custom', methods=['GET', 'POST', 'DELETE'])
 def manage_custom_stores():
     """Manage custom game stores"""
-    conn = sqlite3.connect(DB_FILE)
+    db = Database()
+    conn = db.connection()
     cursor = conn.cursor()
     
     if request.method == 'GET':
@@ -220,7 +370,6 @@ def manage_custom_stores():
                 'pattern': row[3],
                 'active': row[4]
             })
-        conn.close()
         return jsonify({'stores': stores})
     
     elif request.method == 'POST':
@@ -232,13 +381,17 @@ def manage_custom_stores():
         if not all([name, url, pattern]):
             return jsonify({'error': 'All fields are required'}), 400
         
+        # A built-in scraper would always win, so the custom store would never run
+        if name in SCRAPERS:
+            return jsonify({'error': f'{name} is a built-in store'}), 400
+        
         try:
-            cursor.execute(
-                'INSERT INTO custom_stores (name, url, pattern) VALUES (?, ?, ?)',
-                (name, url, pattern)
-            )
-            conn.commit()
-            conn.close()
+            with conn:
+                cursor.execute(
+                    'INSERT INTO custom_stores (name, url, pattern) VALUES (?, ?, ?)',
+                    (name, url, pattern)
+                )
+            db.bump_data_version()
             return jsonify({'success': True, 'message': f'Added custom store: {name}'})
         except sqlite3.IntegrityError:
             return jsonify({'error': 'Store name already exists'}), 400
@@ -250,12 +403,13 @@ def manage_custom_stores():
         store_id = data.get('id')
         
         try:
-            cursor.execute('DELETE FROM custom_stores WHERE id = ?', (store_id,))
-            conn.commit()
-            conn.close()
+            with conn:
+                cursor.execute('DELETE FROM custom_stores WHERE id = ?', (store_id,))
+            db.bump_data_version()
             return jsonify({'success': True, 'message': 'Custom store removed'})
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
+    setup_logging()
     app.run(host='0.0.0.0', port=5000, debug=False)